@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+import zlib
+import json
+import os
+from argparse import ArgumentParser
+from argparse import ArgumentDefaultsHelpFormatter
+from query import scan_dir, filter_entries
+from read_logfile import parse_file_name
+
+"""
+the packed archive of the result files.
+
+the archive consists of two files.
+    iperf.pack: the compressed result files, appended one after another.
+    iperf.pack.idx: the index, one JSON object per line, like below.
+        {"name": "iperf-host-sr-br-1000000-ps-1448-20210723193700150587.txt",
+         "server": "host", "dir": "sr", "br": 1000000, "psize": 1448,
+         "ts": "20210723193700150587", "ext": "txt",
+         "offset": 0, "length": 312}
+both files are only appended.  the data is written before the index
+so that an entry in the index always points to the complete data.
+"""
+
+pack_name = "iperf.pack"
+
+def get_pack_path(result_dir):
+    return f"{result_dir}/{pack_name}" if result_dir else pack_name
+
+def append_entry(pack_path, name, data):
+    """
+    compress the data and append it into the archive.
+    name must be a name of the result file.
+    """
+    entry = parse_file_name(name)
+    if entry is None:
+        raise ValueError(f"invalid file name, {name}")
+    blob = zlib.compress(data.encode())
+    with open(pack_path, "ab") as fd:
+        fd.seek(0, os.SEEK_END)
+        entry["offset"] = fd.tell()
+        entry["length"] = len(blob)
+        fd.write(blob)
+    with open(f"{pack_path}.idx", "a+b") as fd:
+        # terminate the broken line of an interrupted write so that
+        # this entry is not joined with it.
+        if fd.tell() > 0:
+            fd.seek(-1, os.SEEK_END)
+            if fd.read(1) != b"\n":
+                fd.write(b"\n")
+        fd.write((json.dumps(entry) + "\n").encode())
+    return entry
+
+def read_index(pack_path):
+    """
+    return the list of the entries in the archive.
+    a broken line at the end, i.e. an interrupted write, is ignored.
+    """
+    if not os.path.exists(f"{pack_path}.idx"):
+        return []
+    result = []
+    for line in open(f"{pack_path}.idx").read().splitlines():
+        try:
+            result.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return result
+
+def query(pack_path, **kwargs):
+    """
+    return the entries in the archive matched with the conditions.
+    kwargs are passed to query.filter_entries().
+    """
+    return filter_entries(read_index(pack_path), **kwargs)
+
+def read_entry(pack_path, entry):
+    """
+    return the content of the result file in the archive.
+    """
+    with open(pack_path, "rb") as fd:
+        fd.seek(entry["offset"])
+        return zlib.decompress(fd.read(entry["length"])).decode()
+
+def import_dir(result_dir, pack_path, remove=False):
+    """
+    append the result files in the directory into the archive.
+    the files already in the archive are skipped.
+    """
+    names = set([entry["name"] for entry in read_index(pack_path)])
+    nb_items = 0
+    for entry in sorted(scan_dir(result_dir), key=lambda e: e["name"]):
+        if entry["name"] not in names:
+            append_entry(pack_path, entry["name"], open(entry["path"]).read())
+            nb_items += 1
+        if remove:
+            os.remove(entry["path"])
+    return nb_items
+
+def export_dir(pack_path, result_dir, **kwargs):
+    """
+    write the entries in the archive into the directory
+    as the result files.  kwargs are passed to query().
+    """
+    nb_items = 0
+    for entry in query(pack_path, **kwargs):
+        with open(f"{result_dir}/{entry['name']}", "w") as fd:
+            fd.write(read_entry(pack_path, entry))
+        nb_items += 1
+    return nb_items
+
+def main():
+    ap = ArgumentParser(
+            description="manage the packed archive of the iperf_util results.",
+            formatter_class=ArgumentDefaultsHelpFormatter)
+    ap.add_argument("command", choices=["import", "export", "list"],
+                    help="import: the result files into the archive. "
+                        "export: the archive into the result files. "
+                        "list: the entries in the archive.")
+    ap.add_argument("result_dir", help="the directory of the result files.")
+    ap.add_argument("--pack", action="store", dest="pack_path",
+                    help="specify the archive file. "
+                        f"default is {pack_name} in the result directory.")
+    ap.add_argument("--remove", action="store_true", dest="remove",
+                    help="specify to remove the result files imported.")
+    ap.add_argument("--server", action="store", dest="server_name",
+                    help="specify the server name to be exported or listed.")
+    ap.add_argument("--since", action="store", dest="since",
+                    help="specify the oldest timestamp to be exported "
+                        "or listed, e.g. 20210723.")
+    ap.add_argument("--until", action="store", dest="until",
+                    help="specify the latest timestamp to be exported "
+                        "or listed, e.g. 20210723.")
+    opt = ap.parse_args()
+    pack_path = opt.pack_path or get_pack_path(opt.result_dir)
+    if opt.command == "import":
+        n = import_dir(opt.result_dir, pack_path, remove=opt.remove)
+        print(f"imported {n} files into {pack_path}")
+    elif opt.command == "export":
+        if not os.path.exists(opt.result_dir):
+            os.mkdir(opt.result_dir)
+        n = export_dir(pack_path, opt.result_dir, server=opt.server_name,
+                       since=opt.since, until=opt.until)
+        print(f"exported {n} files into {opt.result_dir}")
+    else:
+        for entry in query(pack_path, server=opt.server_name,
+                           since=opt.since, until=opt.until):
+            print(entry["name"])
+
+if __name__ == "__main__" :
+    main()
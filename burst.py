@@ -0,0 +1,90 @@
+from statistics import mean
+
+"""
+detection of the loss bursts and the jitter spikes in the intervals.
+
+the intervals are taken by parse_udp_log(), and must be of the receiver
+side, i.e. the ones with the jitter and the loss.
+each detector passes over the intervals only once, so that it takes
+linear time to the number of the intervals.
+"""
+
+def get_receiver_intervals(intervals):
+    """
+    return the intervals of the receiver side in the direction of the test.
+    in the --bidir mode, RX-C is of the other direction, and the ones of
+    this direction exist only in the server's output, i.e. RX-S.
+    with the parallel streams, the intervals of each stream are interleaved,
+    so only the sum of the streams is taken.
+    """
+    result = [n for n in intervals
+              if n["jitter_ms"] is not None and n["tag"] != "RX-C"]
+    if any([n["stream"] == "SUM" for n in result]):
+        result = [n for n in result if n["stream"] == "SUM"]
+    return result
+
+def detect_bursts(intervals, loss_threshold=1, jitter_factor=3,
+                  jitter_min=1, alpha=0.1):
+    """
+    return the list of the loss bursts and the list of the jitter spikes.
+    each event is a pair of the start and the end in seconds.
+
+    a loss burst is the consecutive intervals with the loss more than
+    loss_threshold percent.
+    a jitter spike is the consecutive intervals with the jitter more than
+    both jitter_min ms and jitter_factor times of the baseline.
+    the baseline is the EWMA of the jitter with the weight alpha,
+    which is updated only by the intervals not in a spike.
+    """
+    loss_bursts = []
+    jitter_spikes = []
+    loss_event = None
+    jitter_event = None
+    baseline = None
+    for n in intervals:
+        # loss
+        if n["lost_percent"] > loss_threshold:
+            if loss_event is None:
+                loss_event = [n["start"], n["end"]]
+            else:
+                loss_event[1] = n["end"]
+        elif loss_event is not None:
+            loss_bursts.append(tuple(loss_event))
+            loss_event = None
+        # jitter
+        jitter = n["jitter_ms"]
+        if (baseline is not None and jitter > jitter_min and
+                jitter > baseline * jitter_factor):
+            if jitter_event is None:
+                jitter_event = [n["start"], n["end"]]
+            else:
+                jitter_event[1] = n["end"]
+        else:
+            if jitter_event is not None:
+                jitter_spikes.append(tuple(jitter_event))
+                jitter_event = None
+            baseline = (jitter if baseline is None else
+                        alpha * jitter + (1 - alpha) * baseline)
+    if loss_event is not None:
+        loss_bursts.append(tuple(loss_event))
+    if jitter_event is not None:
+        jitter_spikes.append(tuple(jitter_event))
+    return loss_bursts, jitter_spikes
+
+def summarize_events(event_list):
+    """
+    return the summary of the events taken from the runs.
+    event_list is the list of the events of each run.
+    count is the mean number of the events in a run.
+    duration is the mean duration of an event in seconds.
+    interval is the mean time between the starts of the events in a run,
+    or None if no run has two events or more.
+    """
+    durations = [e[1] - e[0] for events in event_list for e in events]
+    intervals = [events[i][0] - events[i-1][0]
+                 for events in event_list for i in range(1, len(events))]
+    return {
+            "count": len(durations) / len(event_list),
+            "duration": mean(durations) if durations else 0,
+            "interval": mean(intervals) if intervals else None,
+            }
@@ -0,0 +1,134 @@
+import random
+from itertools import combinations
+from math import comb
+from statistics import mean
+
+"""
+comparison of two results taken by read_result(opt, "br").
+
+each cell, i.e. a pair of the payload size and the target bitrate,
+is compared with the samples of the runs in the cell.
+the significance of the difference of the means is tested by the
+permutation test so that it doesn't depend on the distribution.
+"""
+
+def get_samples(cell, key):
+    """
+    return the list of the values of the receiver in each run of the cell.
+    """
+    return [ds["data"]["receiver"][key] for ds in cell["dataset"]]
+
+def get_min_p(nb_a, nb_b):
+    """
+    return the smallest two-sided p-value which the permutation test can
+    reach with the numbers of the samples.
+    """
+    return 2 / comb(nb_a + nb_b, nb_a)
+
+def permutation_test(a, b, nb_rounds=2000, seed=0, alpha=None):
+    """
+    return the two-sided p-value of the difference of the means of a and b.
+    return None if either has less than two samples, or if alpha is
+    specified and the p-value can't be less than alpha with the numbers
+    of the samples.  e.g. alpha 0.05 needs 4 runs on each side,
+    or 3 runs against 5 runs.
+    all the permutations are tried if the number of them is not more than
+    nb_rounds.  Otherwise, nb_rounds of random permutations are tried.
+    """
+    if len(a) < 2 or len(b) < 2:
+        return None
+    if alpha is not None and get_min_p(len(a), len(b)) > alpha:
+        return None
+    pool = a + b
+    observed = abs(mean(a) - mean(b))
+    if comb(len(pool), len(a)) <= nb_rounds:
+        splits = [set(c) for c in combinations(range(len(pool)), len(a))]
+    else:
+        rng = random.Random(seed)
+        splits = [set(rng.sample(range(len(pool)), len(a)))
+                  for i in range(nb_rounds)]
+    nb_extreme = 0
+    for s in splits:
+        x = [pool[i] for i in range(len(pool)) if i in s]
+        y = [pool[i] for i in range(len(pool)) if i not in s]
+        # a small margin for the rounding error of the floating point.
+        if abs(mean(x) - mean(y)) >= observed - 1e-12:
+            nb_extreme += 1
+    return nb_extreme / len(splits)
+
+def is_significant(p, alpha):
+    """
+    the difference is taken as significant when it can't be tested,
+    so that a cell with too few runs is gated by the threshold.
+    """
+    return p is None or p < alpha
+
+def compare_result(base, cur, max_bps_drop=5, max_loss_increase=1,
+                   alpha=0.05):
+    """
+    return the list of the comparisons of each cell.
+    base and cur are the results taken by read_result(opt, "br").
+    max_bps_drop: the allowed drop of the receiver's bitrate in percent.
+    max_loss_increase: the allowed increase of the loss in percent points.
+    """
+    rows = []
+    for psize in sorted(set(base) | set(cur)):
+        brs = sorted(set(base.get(psize, {})) | set(cur.get(psize, {})))
+        for br in brs:
+            row = {"psize": psize, "br": br}
+            rows.append(row)
+            if br not in base.get(psize, {}) or br not in cur.get(psize, {}):
+                row["verdict"] = "missing"
+                continue
+            for key, name in [("bps", "recv_br"),
+                              ("lost_percent", "lost"),
+                              ("jitter_ms", "jitter")]:
+                a = get_samples(base[psize][br], key)
+                b = get_samples(cur[psize][br], key)
+                row[name] = {
+                        "base": base[psize][br][name],
+                        "cur": cur[psize][br][name],
+                        "p": permutation_test(a, b, alpha=alpha),
+                        }
+            d = row["recv_br"]
+            d["delta"] = ((d["cur"] - d["base"]) / d["base"] * 100
+                          if d["base"] > 0 else 0)
+            bps_regressed = (d["delta"] < -max_bps_drop and
+                             is_significant(d["p"], alpha))
+            d = row["lost"]
+            d["delta"] = d["cur"] - d["base"]
+            loss_regressed = (d["delta"] > max_loss_increase and
+                              is_significant(d["p"], alpha))
+            d = row["jitter"]
+            d["delta"] = d["cur"] - d["base"]
+            if bps_regressed or loss_regressed:
+                row["verdict"] = "REGRESSED"
+            else:
+                row["verdict"] = "ok"
+    return rows
+
+def print_compare(rows):
+    column_size = [8,8,8,8,7,5,6,6,6,5,6,6,5,9]
+    fmt = " ".join([f"{{:>{n}}}" for n in column_size])
+    print(fmt.format(
+            "PL Size", "Tgt Br",
+            "Base Br", "Cur Br", "dBr%", "p",
+            "Base%", "Cur%", "dLost", "p",
+            "Base J", "Cur J", "p",
+            "verdict"))
+    print(" ".join(["-"*n for n in column_size]))
+    fmt_p = lambda p: "-" if p is None else round(p,2)
+    for row in rows:
+        if row["verdict"] == "missing":
+            print(fmt.format(row["psize"], round(row["br"]/1e6,2),
+                             *["-"]*11, row["verdict"]))
+            continue
+        b, l, j = row["recv_br"], row["lost"], row["jitter"]
+        print(fmt.format(
+                row["psize"], round(row["br"]/1e6,2),
+                round(b["base"]/1e6,2), round(b["cur"]/1e6,2),
+                round(b["delta"],1), fmt_p(b["p"]),
+                round(l["base"],3), round(l["cur"],3),
+                round(l["delta"],3), fmt_p(l["p"]),
+                round(j["base"],3), round(j["cur"],3), fmt_p(j["p"]),
+                row["verdict"]))
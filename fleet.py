@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shlex
+import threading
+import time
+from argparse import ArgumentParser
+from argparse import ArgumentDefaultsHelpFormatter
+from iperf_util import get_arg_parser, set_opt, measure, get_measure_time
+
+"""
+run the sweeps against many servers concurrently.
+
+the fleet file is like below.
+    {
+        "concurrency": 2,
+        "targets": [
+            {"name": "tokyo", "server": "tokyo.example.com",
+             "args": "--profile 100m --psize 1448",
+             "share": ["uplink-a"]},
+            {"name": "osaka", "server": "osaka.example.com",
+             "args": "--profile 100m --psize 1448",
+             "share": ["uplink-a"]},
+            {"name": "local", "server": "127.0.0.1", "port": 5202,
+             "args": "--profile 10m --psize 1448 --measure-time 2"}
+        ]
+    }
+"args" is the options of iperf_util.py.
+"share" is the list of the names of the resources, e.g. a bottleneck link,
+which the test uses.  the tests sharing any resource never run at the same
+time.  the server, i.e. the pair of the host and the port, is always taken
+as a resource because iperf3 server accepts one test at a time.
+the results are saved into the directory named by "name" under the save
+directory.
+"""
+
+def make_opt(target, save_dir):
+    """
+    return the options of iperf_util for the target.
+    """
+    args = [target["server"], "--save-dir",
+            os.path.join(save_dir, target["name"])]
+    if target.get("port") is not None:
+        args += ["--port", str(target["port"])]
+    args += shlex.split(target.get("args", ""))
+    opt = set_opt(get_arg_parser().parse_args(args))
+    if not os.path.exists(opt.result_dir):
+        os.makedirs(opt.result_dir)
+    return opt
+
+def get_resources(target):
+    port = target.get("port", 5201)
+    return set([f"{target['server']}:{port}"] + target.get("share", []))
+
+def run_fleet(targets, concurrency, save_dir):
+    """
+    run the sweeps of the targets.
+    return the list of the names of the targets failed.
+    """
+    cv = threading.Condition()
+    state = {"busy": set(), "nb_running": 0, "nb_cells": 0, "nb_done": 0,
+             "failed": []}
+
+    def progress(target, output_file):
+        with cv:
+            state["nb_done"] += 1
+            target["nb_done"] += 1
+            elapsed = time.time() - state["start_time"]
+            eta = elapsed * (state["nb_cells"] - state["nb_done"]) / state["nb_done"]
+            print(f"[fleet] {state['nb_done']}/{state['nb_cells']} cells, "
+                  f"{target['name']} {target['nb_done']}/{target['nb_cells']}, "
+                  f"elapsed {round(elapsed)}s, ETA {round(eta)}s")
+
+    def worker(target):
+        try:
+            measure(target["opt"], progress=lambda f: progress(target, f))
+        except BaseException as e:
+            # iperf() exits when iperf3 fails.
+            print(f"[fleet] ERROR: {target['name']} failed, {repr(e)}")
+            state["failed"].append(target["name"])
+        finally:
+            with cv:
+                state["busy"] -= target["resources"]
+                state["nb_running"] -= 1
+                cv.notify_all()
+
+    def get_next(pending):
+        if state["nb_running"] >= concurrency:
+            return None
+        for target in pending:
+            if not (state["busy"] & target["resources"]):
+                return target
+        return None
+
+    pending = []
+    for target in targets:
+        target["opt"] = make_opt(target, save_dir)
+        target["resources"] = get_resources(target)
+        target["nb_cells"] = (len(target["opt"].br_list) *
+                              len(target["opt"].psize_list))
+        target["nb_done"] = 0
+        state["nb_cells"] += target["nb_cells"]
+        pending.append(target)
+    t = sum([get_measure_time(target["opt"]) for target in pending])
+    print(f"[fleet] {len(pending)} targets, {state['nb_cells']} cells, "
+          f"measure time: {t} seconds without concurrency.")
+    state["start_time"] = time.time()
+    threads = []
+    with cv:
+        while pending:
+            if (target := get_next(pending)) is None:
+                cv.wait()
+                continue
+            print(f"[fleet] start {target['name']}")
+            state["busy"] |= target["resources"]
+            state["nb_running"] += 1
+            pending.remove(target)
+            th = threading.Thread(target=worker, args=(target,))
+            th.start()
+            threads.append(th)
+    for th in threads:
+        th.join()
+    print(f"[fleet] done in {round(time.time() - state['start_time'])}s.")
+    return state["failed"]
+
+def main():
+    ap = ArgumentParser(
+            description="run iperf_util against many servers.",
+            formatter_class=ArgumentDefaultsHelpFormatter)
+    ap.add_argument("fleet_file", help="the fleet file in JSON.")
+    ap.add_argument("--concurrency", action="store", dest="concurrency",
+                    type=int,
+                    help="specify the max number of the tests at a time. "
+                        "it overrides the one in the fleet file.")
+    ap.add_argument("--save-dir", action="store", dest="save_dir",
+                    default=".",
+                    help="specify the directory to save the result files.")
+    opt = ap.parse_args()
+    config = json.load(open(opt.fleet_file))
+    if run_fleet(config["targets"],
+                 opt.concurrency or config.get("concurrency", 1),
+                 opt.save_dir):
+        exit(1)
+
+if __name__ == "__main__" :
+    main()
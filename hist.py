@@ -3,9 +3,15 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from read_logfile import read_tcp_logfile, read_ping_logfile
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from read_logfile import read_tcp_logfile, read_ping_logfile, read_udp_logfile
+from utils import get_percentile
 from argparse import ArgumentParser
 
+percentile_list = [1, 5, 10, 25, 50, 75, 90, 95, 99, 99.9]
+
 def get_range(arg):
     p = arg.split(",")
     if len(p) == 3:
@@ -19,107 +25,232 @@ def get_range(arg):
         v1 = int(p[0])
         skip = 2
     else:
-        print("ERROR:")
-        ap.print_help()
-        exit(1)
+        raise ValueError(f"invalid range, {arg}")
     return v0, v1, range(v0, 1+v1, skip)
 
-ap = ArgumentParser(description="this is example.")
-ap.add_argument("log_file", metavar="LOG_FILE", help="a log file.")
-ap.add_argument("-t", action="store", dest="log_type",
-                choices=["tcp", "udp", "ping"],
-                default="tcp",
-                help="specify the mode to parse the iperf3 mode: tcp or udp.")
-ap.add_argument("-m", action="store", dest="graph_mode",
-                choices=["hist"], default="hist",
-                help="specify the graph mode.")
-ap.add_argument("--graph-yrange", action="store", dest="graph_yrange_str",
-                help="specify yrange min,max number separated by a comma.")
-ap.add_argument("--graph-xrange", action="store", dest="graph_xrange_str",
-                help="specify xrange min,max number separated by a comma.")
-ap.add_argument("--hist-bins", action="store", dest="nb_bins",
-                type=int, default=11,
-                help="specify a number of bins for histgram.")
-ap.add_argument("--data-xrange", action="store", dest="data_xrange_str",
-                help="specify xrange min,max number separated by a comma.")
-ap.add_argument("--save-graph", action="store", dest="save_file",
-                help="specify a filename to store the graph.")
-opt = ap.parse_args()
-
-if opt.log_type == "tcp":
-    result = read_tcp_logfile(opt.log_file)
-    sr = pd.Series([n["bps"] for n in result])
-    xlabel = "Throughput (Mbps)"
-    xscale = 1e6
-elif opt.log_type == "ping":
-    result = read_ping_logfile(opt.log_file)
-    print(result)
-    if opt.data_xrange_str:
-        x0, x1, step = get_range(opt.data_xrange_str)
-        sr = pd.Series([n["rtt"] for n in result if x0 <= n["rtt"] <= x1])
+def get_file_list(args):
+    """
+    return the list of the files.  each argument can be a glob pattern.
+    """
+    result = []
+    for arg in args:
+        if glob.has_magic(arg):
+            result.extend(sorted(glob.glob(arg)))
+        else:
+            result.append(arg)
+    return result
+
+def read_samples(args):
+    """
+    return the list of the samples of the intervals in the log file.
+    it is called in the process pool.
+    """
+    log_file, log_type, key, use_rx = args
+    if log_type == "tcp":
+        return [n["bps"] for n in read_tcp_logfile(log_file)]
+    elif log_type == "ping":
+        return [n["rtt"] for n in read_ping_logfile(log_file)]
+    elif log_type == "udp":
+        # the sum of the parallel streams is not a sample of a stream.
+        result = [n for n in read_udp_logfile(log_file)
+                  if n["stream"] != "SUM"]
+        if key in ["jitter", "lost"] or use_rx:
+            # the receiver side.
+            result = [n for n in result if n["jitter_ms"] is not None]
+        else:
+            # the sender side.
+            result = [n for n in result if n["jitter_ms"] is None]
+        if key == "bps":
+            return [n["bps"] for n in result]
+        elif key == "pps":
+            # packets at the receiver side is the total including the lost.
+            return [(n["packets"] - (n["lost"] or 0))/(n["end"] - n["start"])
+                    for n in result if n["end"] > n["start"]]
+        elif key == "jitter":
+            return [n["jitter_ms"] for n in result]
+        elif key == "lost":
+            return [n["lost_percent"] for n in result]
+    raise ValueError(f"invalid type, {log_type}, {key}")
+
+def get_label(log_type, key):
+    """
+    return the label and the scale of the x axis.
+    """
+    if log_type == "ping":
+        return "RTT (ms)", 1
+    if log_type == "tcp" or key == "bps":
+        return "Throughput (Mbps)", 1e6
+    return {
+            "pps": ("PPS", 1),
+            "jitter": ("Jitter (ms)", 1),
+            "lost": ("Lost (%)", 1),
+            }[key]
+
+def print_percentile(sr, xlabel, xscale, save_file=None):
+    """
+    print the percentiles, and save them in CSV if save_file is specified.
+    """
+    values = sorted(sr)
+    rows = [(p, get_percentile(values, p)/xscale) for p in percentile_list]
+    print(f"## Percentile: {xlabel}")
+    for p, v in rows:
+        print(f"{p:>6} {round(v,3):>12}")
+    if save_file:
+        with open(save_file, "w") as fd:
+            fd.write(f"percentile,{xlabel}\n")
+            for p, v in rows:
+                fd.write(f"{p},{v}\n")
+        print(f"saved to {save_file}")
+
+def make_hist(opt, sr, xlabel, xscale):
+    if opt.graph_xrange_str is not None:
+        # NOTE: in the histgram mode, x_ticks must not be used, use x instead.
+        x_min, x_max, x_ticks = get_range(opt.graph_xrange_str)
+        bins = np.linspace(x_min, x_max, opt.nb_bins)
     else:
-        sr = pd.Series([n["rtt"] for n in result])
-    print(sr)
-    xlabel = "RTT (ms)"
-    xscale = 1
-elif opt.log_type == "udp":
-    raise NotImplementedError
-else:
-    raise ValueError
-    ap.print_help()
-    exit(1)
-
-desc = sr.describe()
-print(f"## Desciption:\n{desc}")
-
-if opt.graph_xrange_str is not None:
-    # NOTE: in the histgram mode, x_ticks must not be used, use x instead.
-    x_min, x_max, x_ticks = get_range(opt.graph_xrange_str)
-    bins = np.linspace(x_min, x_max, opt.nb_bins)
-else:
-    x_min, x_max = sr.min(), sr.max()
-    bins = np.linspace(sr.min(), sr.max(), opt.nb_bins)
-print("## bins:", bins)
-bar_width = (x_max - x_min)/xscale/(opt.nb_bins + 5)
-#print("bar_width =", bar_width)
-
-freq = sr.value_counts(bins=bins, sort=False)
-df = pd.DataFrame({
-        xlabel: bins[1:],
-        "freq": freq,
-    }, index=freq.index)
-print("## Freq", [n for n in df["freq"]])
-
-fig, ax = plt.subplots()
-x = [round(n/xscale,2) for n in df[xlabel]]
-y = [n for n in df["freq"]]
-ax.bar(x, y, width=bar_width)
-ax.set_xticks(x,
-              [str(i) for i in x],
-              rotation=90)
-
-if opt.graph_xrange_str is not None:
-    # x_min, x_max are assigned above.
-    ax.set_xlim(x_min/xscale, x_max/xscale)
-x_min, x_max = ax.get_xlim()
-print(f"x_min = {x_min}")
-print(f"x_max = {x_max}")
-
-if opt.graph_yrange_str is not None:
-    y_min, y_max, y_ticks = get_range(opt.graph_yrange_str)
-    ax.set_ylim(y_min, y_max)
-    ax.set_yticks(y_ticks)
-y_min, y_max = ax.get_ylim()
-print(f"y_min = {y_min}")
-print(f"y_max = {y_max}")
-
-ax.set_xlabel(f"{xlabel}")
-ax.set_ylabel("Frequency")
-ax.grid()
-
-fig.tight_layout()
-
-if opt.save_file:
-    plt.savefig(opt.save_file)
-plt.show()
+        x_min, x_max = sr.min(), sr.max()
+        bins = np.linspace(sr.min(), sr.max(), opt.nb_bins)
+    print("## bins:", bins)
+    bar_width = (x_max - x_min)/xscale/(opt.nb_bins + 5)
+    #print("bar_width =", bar_width)
+
+    freq = sr.value_counts(bins=bins, sort=False)
+    df = pd.DataFrame({
+            xlabel: bins[1:],
+            "freq": freq,
+        }, index=freq.index)
+    print("## Freq", [n for n in df["freq"]])
+
+    fig, ax = plt.subplots()
+    x = [round(n/xscale,2) for n in df[xlabel]]
+    y = [n for n in df["freq"]]
+    ax.bar(x, y, width=bar_width)
+    ax.set_xticks(x,
+                  [str(i) for i in x],
+                  rotation=90)
+
+    if opt.graph_xrange_str is not None:
+        # x_min, x_max are assigned above.
+        ax.set_xlim(x_min/xscale, x_max/xscale)
+    x_min, x_max = ax.get_xlim()
+    print(f"x_min = {x_min}")
+    print(f"x_max = {x_max}")
+
+    if opt.graph_yrange_str is not None:
+        y_min, y_max, y_ticks = get_range(opt.graph_yrange_str)
+        ax.set_ylim(y_min, y_max)
+        ax.set_yticks(y_ticks)
+    y_min, y_max = ax.get_ylim()
+    print(f"y_min = {y_min}")
+    print(f"y_max = {y_max}")
+
+    ax.set_xlabel(f"{xlabel}")
+    ax.set_ylabel("Frequency")
+    ax.grid()
+
+    fig.tight_layout()
+
+    if opt.save_file:
+        fig.savefig(opt.save_file)
+        print(f"saved to {opt.save_file}")
+
+def make_cdf(opt, sr, xlabel, xscale):
+    x = np.sort(sr.to_numpy())/xscale
+    y = np.arange(1, len(x)+1)/len(x)
+
+    fig, ax = plt.subplots()
+    ax.step(x, y, where="post")
+    if opt.graph_xrange_str is not None:
+        x_min, x_max, x_ticks = get_range(opt.graph_xrange_str)
+        ax.set_xlim(x_min/xscale, x_max/xscale)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(f"{xlabel}")
+    ax.set_ylabel("Cumulative probability")
+    ax.grid()
+
+    fig.tight_layout()
+
+    if opt.save_cdf_file:
+        fig.savefig(opt.save_cdf_file)
+        print(f"saved to {opt.save_cdf_file}")
+
+def main():
+    ap = ArgumentParser(description="this is example.")
+    ap.add_argument("log_file", metavar="LOG_FILE", nargs="+",
+                    help="log files.  a glob pattern can be used.")
+    ap.add_argument("-t", action="store", dest="log_type",
+                    choices=["tcp", "udp", "ping"],
+                    default="tcp",
+                    help="specify the mode to parse the iperf3 mode: tcp or udp.")
+    ap.add_argument("-k", action="store", dest="key",
+                    choices=["bps", "pps", "jitter", "lost"],
+                    default="bps",
+                    help="specify the value of UDP to be taken. "
+                        "jitter and lost are of the receiver side.")
+    ap.add_argument("--rx", action="store_true", dest="use_rx",
+                    help="specify to take bps or pps of UDP "
+                        "at the receiver side.")
+    ap.add_argument("-m", action="store", dest="graph_mode",
+                    choices=["hist", "cdf", "all"], default="hist",
+                    help="specify the graph mode.")
+    ap.add_argument("--graph-yrange", action="store", dest="graph_yrange_str",
+                    help="specify yrange min,max number separated by a comma.")
+    ap.add_argument("--graph-xrange", action="store", dest="graph_xrange_str",
+                    help="specify xrange min,max number separated by a comma.")
+    ap.add_argument("--hist-bins", action="store", dest="nb_bins",
+                    type=int, default=11,
+                    help="specify a number of bins for histgram.")
+    ap.add_argument("--data-xrange", action="store", dest="data_xrange_str",
+                    help="specify xrange min,max number separated by a comma.")
+    ap.add_argument("--save-graph", action="store", dest="save_file",
+                    help="specify a filename to store the histgram.")
+    ap.add_argument("--save-cdf", action="store", dest="save_cdf_file",
+                    help="specify a filename to store the CDF.")
+    ap.add_argument("--save-percentile", action="store",
+                    dest="save_percentile_file",
+                    help="specify a filename to store the percentiles in CSV.")
+    ap.add_argument("--no-show-graph", action="store_false", dest="show_graph",
+                    help="specify not to show the graph, "
+                        "i.e. to run without the display.")
+    ap.add_argument("--jobs", action="store", dest="nb_jobs",
+                    type=int, default=os.cpu_count(),
+                    help="specify the number of the processes "
+                        "to read the log files.")
+    opt = ap.parse_args()
+
+    if not opt.show_graph:
+        plt.switch_backend("Agg")
+
+    file_list = get_file_list(opt.log_file)
+    if len(file_list) == 0:
+        ap.error("no log file found.")
+    args = [(f, opt.log_type, opt.key, opt.use_rx) for f in file_list]
+    if len(file_list) == 1:
+        samples = [read_samples(args[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=opt.nb_jobs) as executor:
+            samples = list(executor.map(read_samples, args, chunksize=16))
+    values = [v for n in samples for v in n]
+    print(f"## {len(values)} samples in {len(file_list)} files.")
+    if len(values) == 0:
+        ap.error("no sample found.")
+
+    xlabel, xscale = get_label(opt.log_type, opt.key)
+    if opt.log_type == "ping" and opt.data_xrange_str:
+        x0, x1, step = get_range(opt.data_xrange_str)
+        values = [n for n in values if x0 <= n <= x1]
+    sr = pd.Series(values)
+
+    desc = sr.describe()
+    print(f"## Desciption:\n{desc}")
+    print_percentile(sr, xlabel, xscale, opt.save_percentile_file)
+
+    if opt.graph_mode in ["hist", "all"]:
+        make_hist(opt, sr, xlabel, xscale)
+    if opt.graph_mode in ["cdf", "all"]:
+        make_cdf(opt, sr, xlabel, xscale)
+    if opt.show_graph:
+        plt.show()
 
+if __name__ == "__main__" :
+    main()
@@ -2,29 +2,51 @@
 
 from subprocess import Popen, DEVNULL, PIPE
 import shlex
+import signal
+import time
 import matplotlib.pyplot as plt
-import glob
 import os
 import re
 from argparse import ArgumentParser
 from argparse import ArgumentDefaultsHelpFormatter
-from utils import get_ts, convert_xnum, get_test_list
-from read_logfile import read_logfile
+from argparse import ArgumentTypeError
+from utils import get_ts, get_ts_range, convert_xnum, get_test_list
+from utils import get_percentile, parse_cpu_list
+from read_logfile import parse_log, parse_ping_window, parse_udp_log
+from burst import get_receiver_intervals, detect_bursts, summarize_events
+from query import scan_dir, filter_entries
+from compare import compare_result, print_compare
+from server_pool import lease_port, scan_server_logs, match_server_log
+import archive
+import render_cache
+import shutil
+import copy
+import timing
+import cProfile
 import json
 from statistics import mean
 
 #
 # measurement
 #
-def iperf(cmd, output_file):
+def iperf(cmd, output_file, pack_file=None, placement=None):
     """
     the option --logfile doesn't save the command line.
     So, it uses Popen() to take the output of the command,
     save both the command line and the output into the result file.
+    if pack_file is specified, the result is appended into the archive
+    with the name of output_file instead.
+    if placement is specified, it is saved in the second line.
     """
-    with Popen(shlex.split(cmd),
-                stdin=DEVNULL, stdout=PIPE, stderr=PIPE) as proc:
-        outs, errs = proc.communicate()
+    preexec_fn = None
+    if placement is not None and placement["method"] == "sched_setaffinity":
+        preexec_fn = lambda: os.sched_setaffinity(0, placement["cpus"])
+    with timing.phase("iperf.spawn"):
+        proc = Popen(shlex.split(cmd), stdin=DEVNULL, stdout=PIPE, stderr=PIPE,
+                     preexec_fn=preexec_fn)
+    with proc:
+        with timing.phase("iperf.wait"):
+            outs, errs = proc.communicate()
         if len(errs) > 0:
             print(errs)
         if proc.returncode != 0:
@@ -33,46 +55,289 @@ def iperf(cmd, output_file):
         # modify the output
         if not outs.startswith(b"{"):
             outs = b"\n".join(outs.split(b"\n")[1:])
-        with open(output_file, "w") as fd:
-            fd.write(f"% {cmd}\n")
-            fd.write(outs.decode())
+        data = f"% {cmd}\n"
+        if placement is not None:
+            data += f"% affinity {get_placement_str(placement)}\n"
+        data += outs.decode()
+        if pack_file:
+            archive.append_entry(pack_file, os.path.basename(output_file),
+                                 data)
+        else:
+            with open(output_file, "w") as fd:
+                fd.write(data)
+        return data
+
+def ping_start(opt, output_file):
+    """
+    start ping in the background to take the RTT while iperf is running.
+    the output is directly written into the file because the number of
+    the lines can be large when the interval is short.
+    it waits for ping_idle_time so that the RTT without the load is taken
+    before iperf starts.
+    """
+    cmd = f"ping -D -n -i {opt.ping_interval} {opt.server_name}"
+    fd = open(output_file, "w")
+    fd.write(f"% {cmd}\n")
+    fd.flush()
+    proc = Popen(shlex.split(cmd), stdin=DEVNULL, stdout=fd, stderr=DEVNULL)
+    time.sleep(opt.ping_idle_time)
+    return proc, fd
+
+def ping_stop(proc, fd, window):
+    """
+    stop ping, and save the window of the iperf run so that the samples can
+    be split into the idle ones and the loaded ones.
+    """
+    proc.send_signal(signal.SIGINT)
+    proc.wait()
+    fd.write(f"% window {window[0]} {window[1]}\n")
+    fd.close()
+
+def get_nic_cpus(nic):
+    """
+    return the CPUs local to the NIC, and the NUMA node read from sysfs.
+    None is returned for both if the NIC doesn't belong to any node,
+    e.g. on a single socket host or of a virtual device.
+    only the CPUs allowed to this process are taken.
+    """
+    allowed = os.sched_getaffinity(0)
+    try:
+        node = int(open(f"/sys/class/net/{nic}/device/numa_node").read())
+    except FileNotFoundError:
+        if not os.path.exists(f"/sys/class/net/{nic}"):
+            raise ValueError(f"ERROR: no such NIC, {nic}")
+        node = -1
+    if node < 0:
+        return None, None
+    cpus = parse_cpu_list(
+            open(f"/sys/devices/system/node/node{node}/cpulist").read())
+    return [n for n in cpus if n in allowed], node
+
+def get_placement(opt):
+    """
+    return the placement of the iperf3 client, or None if not specified.
+    the CPUs are taken from --affinity, or the ones local to --nic.
+    a single stream is bound to the first CPU by the -A option of iperf3.
+    the parallel streams are spread over the first CPUs as many as
+    the streams by sched_setaffinity().  note that iperf3 before 3.16 runs
+    all the streams in a single thread, i.e. on one of the CPUs.
+    iperf3 is not bound if the NIC doesn't belong to any NUMA node.
+    """
+    if opt.affinity is None and opt.nic is None:
+        return None
+    node = None
+    if opt.affinity is not None:
+        cpus = parse_cpu_list(opt.affinity)
+    else:
+        cpus, node = get_nic_cpus(opt.nic)
+        if cpus is None:
+            print(f"WARNING: {opt.nic} doesn't belong to any NUMA node, "
+                  "iperf3 is not bound to any CPU.")
+            return None
+    if len(cpus) == 0:
+        raise ValueError("ERROR: no CPU to run iperf3 on.")
+    if opt.nb_parallel == 1:
+        return {"cpus": cpus[:1], "node": node, "nic": opt.nic,
+                "method": "-A"}
+    return {"cpus": cpus[:opt.nb_parallel], "node": node, "nic": opt.nic,
+            "method": "sched_setaffinity"}
+
+def get_placement_str(placement):
+    return "cpus={} node={} nic={} method={}".format(
+            ",".join([str(n) for n in placement["cpus"]]),
+            "-" if placement["node"] is None else placement["node"],
+            placement["nic"] or "-",
+            placement["method"])
 
-def measure(opt):
+def get_direction(opt):
+    if opt.bidir:
+        return "bd"
+    return "rs" if opt.reverse else "sr"
+
+def run_test(opt, br, psize):
+    """
+    run iperf with the bitrate and the payload size.
+    return the name of the result file, and the output of iperf.
+    """
     cmd_fmt = "iperf3 -u -c {name} -P {nb_parallel} -t {time} -b {{br}} -l {{psize}}".format(**{
             "name": opt.server_name,
             "nb_parallel": opt.nb_parallel,
             "time": opt.measure_time})
-    ofile_fmt = "{path}iperf-{name}-{dir}-br-{{br}}-ps-{{psize}}-{{id}}.txt".format(**{
+    ofile_fmt = "{path}iperf-{name}-{dir}-br-{{br}}-ps-{{psize}}-{{id}}.{{ext}}".format(**{
             "path": f"{opt.result_dir}/" if opt.result_dir else "",
             "name": opt.server_name,
-            "dir": "rs" if opt.reverse else "sr"})
+            "dir": get_direction(opt)})
+    pack_file = archive.get_pack_path(opt.result_dir) if opt.archive else None
     if opt.reverse:
         cmd_fmt += " -R"
+    if opt.bidir:
+        cmd_fmt += " --bidir"
+    if opt.server_output:
+        cmd_fmt += " --get-server-output"
+    lease = None
+    if opt.pool_port is not None:
+        # the port is leased until the test finishes.
+        port, lease = lease_port(opt.server_name, opt.pool_port)
+        cmd_fmt += f" -p {port}"
+    elif opt.port is not None:
+        cmd_fmt += f" -p {opt.port}"
+    placement = get_placement(opt)
+    if placement is not None and placement["method"] == "-A":
+        cmd_fmt += f" -A {placement['cpus'][0]}"
+    cmd = cmd_fmt.format(**{"br":br, "psize":psize})
+    print(cmd)
+    if placement is not None:
+        print(f"affinity: {get_placement_str(placement)}")
+    ts = get_ts()
+    output_file = ofile_fmt.format(**{
+            "br": br,
+            "psize": psize,
+            "id": ts,
+            "ext": "txt",
+            })
+    if opt.with_ping:
+        ping_file = ofile_fmt.format(**{
+                "br": br,
+                "psize": psize,
+                "id": ts,
+                "ext": "ping",
+                })
+        ping_proc, ping_fd = ping_start(opt, ping_file)
+    t0 = time.time()
+    try:
+        data = iperf(cmd, output_file, pack_file, placement)
+    finally:
+        # ping must be stopped even when iperf failed.
+        t1 = time.time()
+        if opt.with_ping:
+            ping_stop(ping_proc, ping_fd, (t0, t1))
+            if pack_file:
+                archive.append_entry(pack_file,
+                                     os.path.basename(ping_file),
+                                     open(ping_file).read())
+                os.remove(ping_file)
+        if lease is not None:
+            lease.close()
+    return output_file, data
+
+def measure(opt, progress=None):
+    """
+    run iperf for each pair of the bitrate and the payload size.
+    progress is called with the result file after each run if specified.
+    """
     for br in opt.br_list:
         for psize in opt.psize_list:
-            cmd = cmd_fmt.format(**{"br":br, "psize":psize})
-            print(cmd)
-            output_file = ofile_fmt.format(**{
+            output_file, data = run_test(opt, br, psize)
+            if progress:
+                progress(output_file)
+
+def search_pps(opt):
+    """
+    search the highest packets per second with the loss not more than
+    max_loss for each payload size by the bisection.
+    the bitrate of each test is derived from the packets per second.
+    it assumes that the loss increases along with the packets per second.
+    the packets per second are of all the parallel streams,
+    so -b of each stream is divided by the number of the streams.
+    """
+    pps_min, pps_max = [convert_xnum(n) for n in opt.pps_range_str.split(",")]
+    rows = []
+    for psize in opt.psize_list:
+        tests = {}
+        def test(pps):
+            br = round(pps * psize * 8)
+            output_file, data = run_test(opt, round(br / opt.nb_parallel),
+                                         psize)
+            d = parse_log(data.splitlines(), output_file)
+            tests[pps] = {
+                    "pps": pps,
                     "br": br,
-                    "psize": psize,
-                    "id": get_ts(),
-                    })
-            iperf(cmd, output_file)
+                    "recv_pps": d["receiver"]["bps"]/8/psize,
+                    "lost": d["receiver"]["lost_percent"],
+                    }
+            print(f"pps: {pps} lost: {tests[pps]['lost']}%")
+            return tests[pps]["lost"] <= opt.max_loss
+        lo, hi = pps_min, pps_max
+        best = None
+        if test(hi):
+            best = hi
+        elif test(lo):
+            best = lo
+            # the bounds never move when they are next to each other.
+            while ((hi - lo) / hi * 100 > opt.pps_resolution and
+                   hi - lo > 1):
+                mid = round((lo + hi) / 2)
+                if test(mid):
+                    lo = best = mid
+                else:
+                    hi = mid
+        row = {"psize": psize, "nb_tests": len(tests)}
+        if best is not None:
+            row.update(tests[best])
+        rows.append(row)
+    print_pps_capacity(rows)
+    return rows
+
+def print_pps_capacity(rows):
+    column_size = [8,10,8,10,6,5]
+    fmt = " ".join([f"{{:>{n}}}" for n in column_size])
+    print(fmt.format("PL Size", "Max PPS", "Tgt Br", "Rcv PPS", "lost%",
+                     "tests"))
+    print(" ".join(["-"*n for n in column_size]))
+    for row in rows:
+        if "pps" not in row:
+            print(fmt.format(row["psize"], "-", "-", "-", "-",
+                             row["nb_tests"]))
+            continue
+        print(fmt.format(
+                row["psize"],
+                row["pps"],
+                round(row["br"]/1e6,2),
+                round(row["recv_pps"],1),
+                round(row["lost"],3),
+                row["nb_tests"]))
 
 #
 # graph
 #
+def get_rtt(d, key):
+    """
+    return the RTT in ms, or "-" if the RTT was not measured.
+    """
+    return "-" if d[key] is None else round(d[key],3)
+
+def has_reverse(result):
+    """
+    return True if any result was taken in the --bidir mode.
+    """
+    return any(["rev_recv_br" in result[k1][k2]
+                for k1 in result for k2 in result[k1]])
+
 def print_result(result, x_axis):
     assert x_axis in ["br", "psize"]
+    with_rtt = any([result[k1][k2]["rtt_loaded_p50"] is not None
+                    for k1 in result for k2 in result[k1]])
+    with_rev = has_reverse(result)
+    with_burst = any([result[k1][k2]["loss_burst"] is not None
+                      for k1 in result for k2 in result[k1]])
     column_size = [8,8,8,8,8,8,6,6]
+    header = ["Tgt Br", "PL Size",
+              "Snd Br", "Rcv Br",
+              "Snd PPS", "Rcv PPS",
+              "lost%", "jitter"]
+    if with_rev:
+        column_size += [8,8,6,6]
+        header += ["R Snd Br", "R Rcv Br", "Rlost%", "Rjittr"]
+    if with_rtt:
+        column_size += [8,8,8,8]
+        header += ["Idle p50", "Idle p99", "Load p50", "Load p99"]
+    if with_burst:
+        column_size += [6,6,6,6,6,6]
+        header += ["Bursts", "B dur", "B intv", "Spikes", "S dur", "S intv"]
     fmt = " ".join([f"{{:{n}}}" for n in column_size])
     if x_axis == "br":
         k1 = ""
-    print(fmt.format(
-            "Tgt Br", "PL Size",
-            "Snd Br", "Rcv Br",
-            "Snd PPS", "Rcv PPS",
-            "lost%", "jitter"))
+    print(fmt.format(*header))
     print(" ".join(["-"*n for n in column_size]))
     for k1 in sorted(result.keys()):
         for k2 in sorted(result[k1].keys()):
@@ -83,7 +348,7 @@ def print_result(result, x_axis):
             else:
                 br = k1
                 psize = k2
-            print(fmt.format(
+            values = [
                 round(br/1e6,2),
                 psize,
                 round(d["send_br"]/1e6,2),
@@ -91,58 +356,146 @@ def print_result(result, x_axis):
                 round(d["send_pps"]/1e6,2),
                 round(d["recv_pps"]/1e6,2),
                 round(d["lost"],3),
-                round(d["jitter"],3)))
+                round(d["jitter"],3)]
+            if with_rev and "rev_recv_br" in d:
+                values += [
+                    round(d["rev_send_br"]/1e6,2),
+                    round(d["rev_recv_br"]/1e6,2),
+                    round(d["rev_lost"],3),
+                    round(d["rev_jitter"],3)]
+            elif with_rev:
+                values += ["-"]*4
+            if with_rtt:
+                values += [
+                    get_rtt(d, "rtt_idle_p50"),
+                    get_rtt(d, "rtt_idle_p99"),
+                    get_rtt(d, "rtt_loaded_p50"),
+                    get_rtt(d, "rtt_loaded_p99")]
+            if with_burst and d["loss_burst"] is not None:
+                for k in ["loss_burst", "jitter_spike"]:
+                    values += [
+                        round(d[k]["count"],2),
+                        round(d[k]["duration"],2),
+                        "-" if d[k]["interval"] is None else
+                        round(d[k]["interval"],2)]
+            elif with_burst:
+                values += ["-"]*6
+            print(fmt.format(*values))
+
+def select_result(opt):
+    """
+    return the entries of the results matched with the options,
+    and a function to read the lines of an entry.
+    the directory is scanned only once regardless of the number of
+    the bitrates and the payload sizes.
+    """
+    conditions = {
+            "server": opt.server_name,
+            "direction": get_direction(opt),
+            "br_list": opt.br_list,
+            "psize_list": opt.psize_list,
+            "since": opt.since,
+            "until": opt.until,
+            }
+    if opt.archive:
+        pack_file = archive.get_pack_path(opt.result_dir)
+        entries = archive.query(pack_file, **conditions)
+        read_lines = lambda entry: archive.read_entry(
+                pack_file, entry).splitlines()
+    else:
+        entries = filter_entries(scan_dir(opt.result_dir), **conditions)
+        read_lines = lambda entry: open(entry["path"]).read().splitlines()
+    return entries, read_lines
+
+def get_port(cmdline):
+    """
+    return the port number of the server in the command line of iperf3.
+    """
+    r = re.search("\\s-p\\s+(\\d+)", cmdline)
+    return int(r.group(1)) if r else 5201
 
 def read_result(opt, x_axis):
     assert x_axis in ["br", "psize"]
-    template = "{path}iperf-{name}-{dir}-br-{{br}}-ps-{{psize}}-*.txt".format(
-            **{
-            "path": f"{opt.result_dir}/" if opt.result_dir else "",
-            "name": opt.server_name,
-            "dir": "rs" if opt.reverse else "sr"
-            })
-    base_list = []
-    for br in opt.br_list:
-        for psize in opt.psize_list:
-            glob_name = template.format(**{"br": br, "psize": psize})
-            if opt.debug:
-                print(f"glob: {glob_name}")
-            base_list.extend(glob.glob(glob_name))
+    with timing.phase("read_result.scan"):
+        entries, read_lines = select_result(opt)
+        server_logs = (scan_server_logs(opt.server_log_dir)
+                       if opt.server_log_dir else [])
+    base_list = sorted([e for e in entries if e["ext"] == "txt"],
+                       key=lambda e: e["name"])
+    ping_list = {e["name"]: e for e in entries if e["ext"] == "ping"}
+    if opt.debug:
+        print(f"{len(base_list)} result files found.")
     result = {}
-    for fname in base_list:
-        r = re.match(".*iperf-"
-                     "[^-]+-"
-                     "[^-]+-"
-                     "br-([^-]+)-"
-                     "ps-([^-]+)-"
-                     ".*.txt", fname)
-        if r:
-            if x_axis == "br":
-                k1 = r.group(2) # psize
-                k2 = r.group(1) # br
-            else:
-                k1 = r.group(1) # br
-                k2 = r.group(2) # psize
-            x0 = result.setdefault(convert_xnum(k1), {})
-            x1 = x0.setdefault(convert_xnum(k2), {
-                    "dataset": [],
-                    "send_br": 0,
-                    "recv_br": 0,
-                    "send_pps": 0,
-                    "recv_pps": 0,
-                    "lost": 0,
-                    "jitter": 0,
-                    })
-            d = read_logfile(fname)
-            x1["dataset"].append({"name": fname, "data": d})
-            ds = d["sender"]
-            dr = d["receiver"]
-            x1["send_br"] += ds["bps"]
-            x1["recv_br"] += dr["bps"]
-            x1["send_pps"] += (ds["bps"]/8/ds["payload_size"]*1e6)
-            x1["recv_pps"] += (dr["bps"]/8/ds["payload_size"]*1e6)
-            x1["lost"] += dr["lost_percent"]
-            x1["jitter"] += dr["jitter_ms"]
+    for entry in base_list:
+        fname = entry.get("path", entry["name"])
+        if x_axis == "br":
+            k1 = entry["psize"]
+            k2 = entry["br"]
+        else:
+            k1 = entry["br"]
+            k2 = entry["psize"]
+        x0 = result.setdefault(k1, {})
+        x1 = x0.setdefault(k2, {
+                "dataset": [],
+                "send_br": 0,
+                "recv_br": 0,
+                "send_pps": 0,
+                "recv_pps": 0,
+                "lost": 0,
+                "jitter": 0,
+                })
+        with timing.phase("read_result.read"):
+            lines = read_lines(entry)
+        with timing.phase("read_result.parse"):
+            d = parse_log(lines, fname)
+        x1["dataset"].append({"name": fname, "data": d})
+        if server_logs:
+            server = match_server_log(server_logs, get_port(lines[0]),
+                                      entry["ts"], opt.server_log_tolerance)
+            if server is not None:
+                x1["dataset"][-1]["server"] = server
+            elif opt.debug:
+                print(f"no server output for {fname}")
+        if opt.with_burst:
+            with timing.phase("read_result.burst"):
+                intervals = get_receiver_intervals(parse_udp_log(lines, fname))
+                if not intervals and "server" in x1["dataset"][-1]:
+                    # the receiver side taken by the server pool.
+                    intervals = x1["dataset"][-1]["server"]["intervals"]
+                if intervals:
+                    x1["dataset"][-1]["intervals"] = intervals
+                    (x1["dataset"][-1]["loss_bursts"],
+                     x1["dataset"][-1]["jitter_spikes"]) = detect_bursts(
+                            intervals,
+                            loss_threshold=opt.burst_loss,
+                            jitter_factor=opt.burst_jitter_factor,
+                            jitter_min=opt.burst_jitter_min)
+        ping_name = re.sub("\\.txt$", ".ping", entry["name"])
+        if ping_name in ping_list:
+            with timing.phase("read_result.parse"):
+                x1["dataset"][-1]["ping"] = parse_ping_window(
+                        read_lines(ping_list[ping_name]), ping_name)
+        ds = d["sender"]
+        dr = d["receiver"]
+        x1["send_br"] += ds["bps"]
+        x1["recv_br"] += dr["bps"]
+        x1["send_pps"] += (ds["bps"]/8/ds["payload_size"]*1e6)
+        x1["recv_pps"] += (dr["bps"]/8/ds["payload_size"]*1e6)
+        x1["lost"] += dr["lost_percent"]
+        x1["jitter"] += dr["jitter_ms"]
+        if "reverse" in d:
+            # the server to the client in the --bidir mode.
+            ds = d["reverse"]["sender"]
+            dr = d["reverse"]["receiver"]
+            x1["rev_send_br"] = x1.get("rev_send_br", 0) + ds["bps"]
+            x1["rev_recv_br"] = x1.get("rev_recv_br", 0) + dr["bps"]
+            x1["rev_send_pps"] = x1.get("rev_send_pps", 0) + (
+                    ds["bps"]/8/ds["payload_size"]*1e6)
+            x1["rev_recv_pps"] = x1.get("rev_recv_pps", 0) + (
+                    dr["bps"]/8/ds["payload_size"]*1e6)
+            x1["rev_lost"] = x1.get("rev_lost", 0) + dr["lost_percent"]
+            x1["rev_jitter"] = x1.get("rev_jitter", 0) + dr["jitter_ms"]
+    t0 = time.perf_counter()
     for k1 in result.keys():
         for k2 in result[k1].keys():
             x1 = result[k1][k2]
@@ -154,6 +507,34 @@ def read_result(opt, x_axis):
                 x1["recv_pps"] /= nb_items
                 x1["lost"] /= nb_items
                 x1["jitter"] /= nb_items
+            if "rev_recv_br" in x1:
+                nb_items = len([ds for ds in x1["dataset"]
+                                if "reverse" in ds["data"]])
+                for k in ["rev_send_br", "rev_recv_br", "rev_send_pps",
+                          "rev_recv_pps", "rev_lost", "rev_jitter"]:
+                    x1[k] /= nb_items
+            # RTT under the load.
+            idle = []
+            loaded = []
+            for ds in x1["dataset"]:
+                if "ping" in ds:
+                    idle.extend(ds["ping"]["idle"])
+                    loaded.extend(ds["ping"]["loaded"])
+            x1["rtt_idle_p50"] = get_percentile(idle, 50)
+            x1["rtt_idle_p99"] = get_percentile(idle, 99)
+            x1["rtt_loaded_p50"] = get_percentile(loaded, 50)
+            x1["rtt_loaded_p99"] = get_percentile(loaded, 99)
+            # loss bursts and jitter spikes.
+            runs = [ds for ds in x1["dataset"] if "loss_bursts" in ds]
+            if runs:
+                x1["loss_burst"] = summarize_events(
+                        [ds["loss_bursts"] for ds in runs])
+                x1["jitter_spike"] = summarize_events(
+                        [ds["jitter_spikes"] for ds in runs])
+            else:
+                x1["loss_burst"] = None
+                x1["jitter_spike"] = None
+    timing.add("read_result.aggregate", time.perf_counter() - t0)
     if len(result) == 0:
         raise ValueError("ERROR: the target file list is empty.")
     if opt.verbose:
@@ -161,15 +542,72 @@ def read_result(opt, x_axis):
     print_result(result, x_axis)
     return result
 
-def save_graph(opt, graph_name):
-    ofile = "{path}iperf-{name}-{dir}-{gname}-{ts}.png".format(**{
+def get_graph_file(opt, graph_name):
+    return "{path}iperf-{name}-{dir}-{gname}-{ts}.png".format(**{
             "path": f"{opt.result_dir}/" if opt.result_dir else "",
             "name": opt.server_name,
-            "dir": "rs" if opt.reverse else "sr",
+            "dir": get_direction(opt),
             "gname": graph_name,
             "ts": get_ts()})
-    plt.savefig(ofile)
+
+def save_graph(opt, graph_name):
+    ofile = get_graph_file(opt, graph_name)
+    with timing.phase("graph.savefig"):
+        plt.savefig(ofile)
     print(f"saved to {ofile}")
+    if opt.render_key is not None:
+        with timing.phase("graph.cache"):
+            render_cache.store(render_cache.get_cache_dir(opt.result_dir),
+                               opt.render_key, ofile, opt.render_cache_size)
+
+def get_render_options(opt):
+    """
+    return the options which the graph depends on except the result files.
+    """
+    return {
+            "server": opt.server_name,
+            "direction": get_direction(opt),
+            "br_list": opt.br_list,
+            "psize_list": opt.psize_list,
+            "with_y2": opt.with_y2,
+            "with_rtt": opt.with_rtt,
+            "xlim_max": opt.xlim_max,
+            "ylim_max": opt.ylim_max,
+            "with_burst": opt.with_burst,
+            "burst_loss": opt.burst_loss,
+            "burst_jitter_factor": opt.burst_jitter_factor,
+            "burst_jitter_min": opt.burst_jitter_min,
+            "server_log_tolerance": opt.server_log_tolerance,
+            }
+
+def make_graph(opt, make, kind, graph_name):
+    """
+    make the graph by make(opt).  when the graph is only saved, the one in
+    the render cache is used if the inputs are same, and neither the results
+    are read nor the graph is rendered.
+    graph_name is the name which make() saves the graph with.
+    """
+    opt.render_key = None
+    if not opt.save_graph or opt.show_graph or opt.render_cache_size == 0:
+        make(opt)
+        return
+    with timing.phase("graph.cache"):
+        entries, _ = select_result(opt)
+        if opt.server_log_dir:
+            with os.scandir(opt.server_log_dir) as it:
+                entries += [{"name": de.name, "path": de.path} for de in it]
+        key = render_cache.get_key(entries, kind, get_render_options(opt))
+        cache_dir = render_cache.get_cache_dir(opt.result_dir)
+        cached = render_cache.lookup(cache_dir, key)
+        if cached is not None:
+            ofile = get_graph_file(opt, graph_name)
+            shutil.copyfile(cached, ofile)
+            render_cache.evict(cache_dir, opt.render_cache_size)
+    if cached is not None:
+        print(f"saved to {ofile} from the render cache")
+        return
+    opt.render_key = key
+    make(opt)
 
 def make_pps_graph(opt):
     """
@@ -177,6 +615,7 @@ def make_pps_graph(opt):
     """
     if len(opt.br_list) == 1:
         result = read_result(opt, "psize")
+        t0 = time.perf_counter()
         k1 = list(result.keys())[0]
         fig = plt.figure()
         fig.suptitle(f"PPS and Lost, bitrate = {k1} bps")
@@ -192,6 +631,14 @@ def make_pps_graph(opt):
                         label=f"{k1}",
                         marker="o",
                         linestyle="solid")
+        if has_reverse(result):
+            ax1.plot([brs[br]["rev_send_pps"]/1e6 for br in sorted(brs)],
+                     [brs[br]["rev_lost"] for br in sorted(brs)],
+                     label=f"{k1} R",
+                     color=line1[0].get_color(),
+                     marker="s",
+                     linestyle="dashed")
+            ax1.legend(frameon=False)
         ax1.set_ylim(0)
         print(f"X axes: {ax1.get_xlim()}")
         print(f"Y axes: {ax1.get_ylim()}")
@@ -207,6 +654,7 @@ def make_pps_graph(opt):
 
     else:
         result = read_result(opt, "br")
+        t0 = time.perf_counter()
         #fig = plt.figure(figsize=(9,5))
         fig = plt.figure(figsize=(12,7))
         fig.suptitle(f"PPS and Lost")
@@ -222,6 +670,13 @@ def make_pps_graph(opt):
                             label=f"{psize}",
                             marker="o",
                             linestyle="solid")
+            if has_reverse(result):
+                ax.plot([brs[br]["rev_send_pps"]/1e6 for br in sorted(brs)],
+                        [brs[br]["rev_lost"] for br in sorted(brs)],
+                        label=f"{psize} R",
+                        color=line1[0].get_color(),
+                        marker="s",
+                        linestyle="dashed")
         ax.legend(title="lost", frameon=False, prop={'size':8},
                 bbox_to_anchor=(-.11, 0.8), loc="center right")
         ax.set_ylim(0)
@@ -242,16 +697,26 @@ def make_pps_graph(opt):
                     bbox_to_anchor=(1.11, 0.8), loc="center left")
 
     fig.tight_layout()
+    timing.add("graph.figure", time.perf_counter() - t0)
     if opt.save_graph:
         save_graph(opt, "pps")
     if opt.show_graph:
         plt.show()
 
+def get_rtt_inflation(d, p):
+    """
+    return how much the p-th percentile of RTT is inflated by the load in ms.
+    """
+    if d[f"rtt_loaded_p{p}"] is None or d[f"rtt_idle_p{p}"] is None:
+        return float("nan")
+    return d[f"rtt_loaded_p{p}"] - d[f"rtt_idle_p{p}"]
+
 def make_br_graph(opt):
     """
     to show how much bitrate can be properly used with a certain packet size.
     """
     result = read_result(opt, "br")
+    t0 = time.perf_counter()
 
     if len(result.keys()) == 1:
         psize = list(result.keys())[0]
@@ -279,6 +744,13 @@ def make_br_graph(opt):
                           color=plt.cm.viridis(0.2),
                           marker="o",
                           linestyle="solid")
+        if has_reverse(result):
+            lines += ax1.plot([brs[br]["rev_send_br"]/1e6 for br in sorted(brs)],
+                              [brs[br]["rev_recv_br"]/1e6 for br in sorted(brs)],
+                              label="Reverse bitrate (bps)",
+                              color=plt.cm.viridis(0.2),
+                              marker="s",
+                              linestyle="dashed")
         ax1.set_xlim(0)
         ax1.set_ylim(0)
         print(f"X axes: {ax1.get_xlim()}")
@@ -308,6 +780,24 @@ def make_br_graph(opt):
                             color=plt.cm.viridis(0.5),
                             alpha=0.5)
 
+        if opt.with_rtt:
+            ax4 = ax1.twinx()
+            ax4.set_ylabel("RTT inflation (ms)")
+            if opt.with_y2:
+                ax4.spines["right"].set_position(("outward", 100))
+            lines += ax4.plot(x,
+                            [get_rtt_inflation(brs[br], 50) for br in sorted(brs)],
+                            label="RTT p50 (ms)",
+                            color=plt.cm.viridis(0.7),
+                            marker="x",
+                            linestyle="dotted")
+            lines += ax4.plot(x,
+                            [get_rtt_inflation(brs[br], 99) for br in sorted(brs)],
+                            label="RTT p99 (ms)",
+                            color=plt.cm.viridis(0.7),
+                            marker="x",
+                            linestyle="dashdot")
+
         ax1.legend(handles=lines,
                    bbox_to_anchor=(0.5, 1.1), loc="upper center",
                    ncol=3, frameon=False)
@@ -336,6 +826,13 @@ def make_br_graph(opt):
                              label=f"{psize}",
                              marker="o",
                              linestyle="solid")
+            if has_reverse(result):
+                ax1.plot([brs[br]["rev_send_br"]/1e6 for br in sorted(brs)],
+                         [brs[br]["rev_recv_br"]/1e6 for br in sorted(brs)],
+                         label=f"{psize} R",
+                         color=line1[0].get_color(),
+                         marker="s",
+                         linestyle="dashed")
             ax1.legend(title="Rx rate", frameon=False, prop={'size':8},
                     bbox_to_anchor=(-.11, 0.8), loc="center right")
         if opt.xlim_max == 0:
@@ -365,7 +862,25 @@ def make_br_graph(opt):
                         bbox_to_anchor=(1.11, 0.8), loc="center left")
             ax2.set_ylim(0)
 
+        if opt.with_rtt:
+            ax4 = ax1.twinx()
+            ax4.set_ylabel("RTT p99 inflation (ms)")
+            if opt.with_y2:
+                ax4.spines["right"].set_position(("outward", 60))
+            for psize in sorted(result.keys()):
+                brs = result[psize]
+                x = [brs[br]["send_br"]/1e6 for br in sorted(brs)]
+                ax4.plot(x,
+                        [get_rtt_inflation(brs[br], 99)
+                         for br in sorted(brs)],
+                        label=f"{psize}",
+                        marker="x",
+                        linestyle="dotted")
+            ax4.legend(title="RTT p99", frameon=False, prop={'size':8},
+                    bbox_to_anchor=(1.11, 0.3), loc="center left")
+
     fig.tight_layout()
+    timing.add("graph.figure", time.perf_counter() - t0)
     if opt.save_graph:
         save_graph(opt, "br")
     if opt.show_graph:
@@ -376,6 +891,7 @@ def make_tx_graph(opt):
     to show status of Tx, to show if Tx transmits the packets properly.
     """
     result = read_result(opt, "br")
+    t0 = time.perf_counter()
 
     if len(result.keys()) == 1:
         psize = list(result.keys())[0]
@@ -403,6 +919,14 @@ def make_tx_graph(opt):
                           color=plt.cm.viridis(0.2),
                           marker="o",
                           linestyle="solid")
+        if has_reverse(result):
+            lines += ax1.plot(x,
+                              [brs[br]["rev_send_br"]/1e6 for br in sorted(brs)],
+                              label="Reverse bitrate (bps)",
+                              color=plt.cm.viridis(0.2),
+                              marker="s",
+                              linestyle="dashed")
+            ax1.legend(handles=lines, frameon=False)
         ax1.set_xlim(0)
         ax1.set_ylim(0)
         print(f"X axes: {ax1.get_xlim()}")
@@ -431,6 +955,13 @@ def make_tx_graph(opt):
                              label=f"{psize}",
                              marker="o",
                              linestyle="solid")
+            if has_reverse(result):
+                ax1.plot(x,
+                         [brs[br]["rev_send_br"]/1e6 for br in sorted(brs)],
+                         label=f"{psize} R",
+                         color=line1[0].get_color(),
+                         marker="s",
+                         linestyle="dashed")
             ax1.legend(title="Rx rate", frameon=False, prop={'size':8},
                     bbox_to_anchor=(-.11, 0.8), loc="center right")
 
@@ -441,11 +972,108 @@ def make_tx_graph(opt):
         ax1.grid()
 
     fig.tight_layout()
+    timing.add("graph.figure", time.perf_counter() - t0)
     if opt.save_graph:
         save_graph(opt, "br")
     if opt.show_graph:
         plt.show()
 
+def make_timeline_graph(opt):
+    """
+    to show the loss and the jitter of each interval along the time,
+    and where the loss bursts and the jitter spikes are.
+    the runs are placed one after another in order of the payload size
+    and the bitrate.
+    """
+    result = read_result(opt, "br")
+    t0 = time.perf_counter()
+
+    fig = plt.figure(figsize=(12,7))
+    fig.suptitle(f"Loss and Jitter timeline")
+    ax1 = fig.add_subplot(1,1,1)
+    ax1.set_xlabel("Time (s)")
+    ax1.set_ylabel("Rx Lost (%)")
+    ax2 = ax1.twinx()
+    ax2.set_ylabel("Jitter (ms)")
+
+    offset = 0
+    for psize in sorted(result.keys()):
+        brs = result[psize]
+        for br in sorted(brs):
+            for ds in brs[br]["dataset"]:
+                if "intervals" not in ds:
+                    continue
+                intervals = ds["intervals"]
+                x = [offset + n["end"] for n in intervals]
+                ax1.plot(x, [n["lost_percent"] for n in intervals],
+                         color=plt.cm.viridis(0.2), linewidth=0.8)
+                ax2.plot(x, [n["jitter_ms"] for n in intervals],
+                         color=plt.cm.viridis(0.7), linewidth=0.8,
+                         alpha=0.7)
+                for start, end in ds["loss_bursts"]:
+                    ax1.axvspan(offset + start, offset + end,
+                                color="red", alpha=0.2, linewidth=0)
+                for start, end in ds["jitter_spikes"]:
+                    ax1.axvspan(offset + start, offset + end,
+                                color="orange", alpha=0.2, linewidth=0)
+                ax1.axvline(offset, color="k", alpha=0.2, linestyle="dashed")
+                ax1.text(offset, 1.0, f"{psize}B/{round(br/1e6,2)}M",
+                         transform=ax1.get_xaxis_transform(),
+                         rotation=90, va="top", fontsize=6)
+                offset += intervals[-1]["end"]
+    if offset == 0:
+        raise ValueError("ERROR: no interval of the receiver side found.")
+    ax1.set_xlim(0, offset)
+    ax1.set_ylim(0)
+    ax2.set_ylim(0)
+    print(f"X axes: {ax1.get_xlim()}")
+    print(f"Y axes: {ax1.get_ylim()}")
+    ax1.grid()
+
+    fig.tight_layout()
+    timing.add("graph.figure", time.perf_counter() - t0)
+    if opt.save_graph:
+        save_graph(opt, "timeline")
+    if opt.show_graph:
+        plt.show()
+
+#
+# comparison
+#
+def compare(opt):
+    """
+    compare the current result with the baseline.
+    the baseline is taken from either the other directory,
+    or the other time window in the same directory.
+    return True if any cell regressed.
+    """
+    base_opt = copy.copy(opt)
+    if opt.baseline_dir is not None:
+        base_opt.result_dir = opt.baseline_dir
+    if opt.baseline_since is not None or opt.baseline_until is not None:
+        base_opt.since = opt.baseline_since
+        base_opt.until = opt.baseline_until
+        if (opt.baseline_dir is None and opt.since is None and
+                opt.until is None):
+            # the current results must not include the baseline.
+            if opt.baseline_until is None:
+                raise ValueError("ERROR: --since or --until is needed "
+                                 "with --baseline-since only.")
+            _, ts = get_ts_range(None, opt.baseline_until)
+            opt = copy.copy(opt)
+            opt.since = str(int(ts) + 1).zfill(len(ts))
+    print("## baseline")
+    base = read_result(base_opt, "br")
+    print("## current")
+    cur = read_result(opt, "br")
+    print("## comparison")
+    rows = compare_result(base, cur,
+                          max_bps_drop=opt.max_bps_drop,
+                          max_loss_increase=opt.max_loss_increase,
+                          alpha=opt.alpha)
+    print_compare(rows)
+    return any([row["verdict"] == "REGRESSED" for row in rows])
+
 br_profile = {
     "1g": "1m,100m,200m,400m,600m,800m,1000m",
     "x1g": "1m,100m,200m,300m,400m,500m,600m,700m,800m,900m,1000m",
@@ -459,7 +1087,13 @@ br_profile = {
     "x10m": "1m,2m,3m,4m,5m,6m,7m,8m,9m,10m",
     }
 
-def main():
+def positive_float(arg):
+    v = float(arg)
+    if v <= 0:
+        raise ArgumentTypeError(f"must be more than 0, {arg}")
+    return v
+
+def get_arg_parser():
     ap = ArgumentParser(
             description="a utility for iperf3",
             formatter_class=ArgumentDefaultsHelpFormatter,
@@ -479,14 +1113,73 @@ def main():
     ap.add_argument("--psize", metavar="PSIZE_SPEC", action="store",
                     dest="psize_list_str",
                     help="specify the list of the payload sizes.")
-    ap.add_argument("--reverse", action="store_true", dest="reverse",
+    ap.add_argument("--port", action="store", dest="port",
+                    type=int,
+                    help="specify the port number of the server.")
+    ap_dir = ap.add_mutually_exclusive_group()
+    ap_dir.add_argument("--reverse", action="store_true", dest="reverse",
                     help="specify to test reversely.")
+    ap_dir.add_argument("--bidir", action="store_true", dest="bidir",
+                    help="specify to test both directions at the same time.")
     ap.add_argument("--parallel", action="store", dest="nb_parallel",
                     type=int, default=1,
                     help="specify the number of parallel clients to run.")
+    ap.add_argument("--affinity", metavar="CPU_LIST", action="store",
+                    dest="affinity",
+                    help="specify the CPUs to run iperf3 on, e.g. 2,4-7. "
+                        "the parallel clients are spread over them, "
+                        "which needs iperf3 3.16 or later running "
+                        "each stream in its own thread.")
+    ap.add_argument("--nic", action="store", dest="nic",
+                    help="specify the NIC for the test in order to run "
+                        "iperf3 on the CPUs of its NUMA node "
+                        "if --affinity is not specified.  iperf3 is not "
+                        "bound if the NIC doesn't belong to any node.")
     ap.add_argument("--measure-time", action="store", dest="measure_time",
                     type=int, default=10,
                     help="specify a time to measure one.")
+    ap.add_argument("--pps-search", action="store_true", dest="do_pps_search",
+                    help="specify to search the highest packets per second "
+                        "with the loss not more than --max-loss "
+                        "for each payload size.")
+    ap.add_argument("--pps-range", metavar="MIN,MAX", action="store",
+                    dest="pps_range_str", default="1k,1m",
+                    help="specify the range of packets per second to search.")
+    ap.add_argument("--pps-resolution", action="store", dest="pps_resolution",
+                    type=positive_float, default=2,
+                    help="specify the resolution of the search in percent.")
+    ap.add_argument("--max-loss", action="store", dest="max_loss",
+                    type=float, default=0.1,
+                    help="specify the acceptable loss in percent "
+                        "in the pps search.")
+    ap.add_argument("--server-output", action="store_true",
+                    dest="server_output",
+                    help="specify to save the output of the server, "
+                        "which has the loss and the jitter of each interval.")
+    ap.add_argument("--pool", metavar="CONTROL_PORT", action="store",
+                    dest="pool_port", type=int,
+                    help="specify the control port of server_pool.py "
+                        "running on the server to lease a free port "
+                        "for each test.  --port is ignored.")
+    ap.add_argument("--server-log-dir", action="store", dest="server_log_dir",
+                    help="specify the directory of the outputs taken by "
+                        "server_pool.py in order to merge the intervals "
+                        "of the receiver side into the results.")
+    ap.add_argument("--server-log-tolerance", action="store",
+                    dest="server_log_tolerance", type=float, default=10,
+                    help="specify the allowed time in seconds between "
+                        "the timestamp of the result file and the start "
+                        "of the server output.")
+    ap.add_argument("--ping", action="store_true", dest="with_ping",
+                    help="specify to run ping while iperf is running "
+                        "in order to measure the latency under the load.")
+    ap.add_argument("--ping-interval", action="store", dest="ping_interval",
+                    type=float, default=0.2,
+                    help="specify the interval of ping in seconds.")
+    ap.add_argument("--ping-idle-time", action="store", dest="ping_idle_time",
+                    type=float, default=2,
+                    help="specify a time to take the idle RTT "
+                        "before iperf starts.")
     ap.add_argument("--graph-br", action="store_true", dest="make_br_graph",
                     help="specify to make a br graph.")
     ap.add_argument("--graph-pps", action="store_true", dest="make_pps_graph",
@@ -495,6 +1188,34 @@ def main():
                     help="specify to make a Tx graph.")
     ap.add_argument("--graph-y2", action="store_true", dest="with_y2",
                     help="specify to make a graph with the second Y axes.")
+    ap.add_argument("--graph-rtt", action="store_true", dest="with_rtt",
+                    help="specify to add the RTT inflation axes "
+                        "into the br graph.")
+    ap.add_argument("--graph-timeline", action="store_true",
+                    dest="make_timeline_graph",
+                    help="specify to make a timeline graph of the loss and "
+                        "the jitter of each interval with the bursts. "
+                        "it implies --burst.")
+    ap.add_argument("--burst", action="store_true", dest="with_burst",
+                    help="specify to detect the loss bursts and the jitter "
+                        "spikes in the intervals of the receiver side. "
+                        "the intervals exist in the results taken with "
+                        "--server-output or --reverse.  --bidir needs "
+                        "--server-output since the client's intervals "
+                        "of the receiver side are of the reverse "
+                        "direction.")
+    ap.add_argument("--burst-loss", action="store", dest="burst_loss",
+                    type=float, default=1,
+                    help="specify the loss in percent of an interval "
+                        "to be taken as a burst.")
+    ap.add_argument("--burst-jitter-factor", action="store",
+                    dest="burst_jitter_factor", type=float, default=3,
+                    help="specify the ratio of the jitter to the baseline "
+                        "to be taken as a spike.")
+    ap.add_argument("--burst-jitter-min", action="store",
+                    dest="burst_jitter_min", type=float, default=1,
+                    help="specify the minimum jitter in ms "
+                        "to be taken as a spike.")
     ap.add_argument("--graph-xlim-max", action="store", dest="xlim_max",
                     type=float, default=0,
                     help="specify x max value of the graph.")
@@ -503,38 +1224,109 @@ def main():
                     help="specify y max value of the graph.")
     ap.add_argument("--save-dir", action="store", dest="result_dir",
                     help="specify the directory to save the result files.")
+    ap.add_argument("--archive", action="store_true", dest="archive",
+                    help="specify to save the results into, and read them "
+                        f"from the packed archive, {archive.pack_name}, "
+                        "instead of the result files.")
+    ap.add_argument("--since", action="store", dest="since",
+                    help="specify the oldest timestamp of the results "
+                        "to be read, e.g. 20210723.")
+    ap.add_argument("--until", action="store", dest="until",
+                    help="specify the latest timestamp of the results "
+                        "to be read, e.g. 20210723.")
+    ap.add_argument("--baseline-dir", action="store", dest="baseline_dir",
+                    help="specify the directory of the baseline results "
+                        "to compare the results with.")
+    ap.add_argument("--baseline-since", action="store", dest="baseline_since",
+                    help="specify the oldest timestamp of the baseline "
+                        "results to compare the results with.")
+    ap.add_argument("--baseline-until", action="store", dest="baseline_until",
+                    help="specify the latest timestamp of the baseline "
+                        "results to compare the results with.  the current "
+                        "results start after it unless --since or --until "
+                        "is specified.")
+    ap.add_argument("--max-bps-drop", action="store", dest="max_bps_drop",
+                    type=float, default=5,
+                    help="specify the allowed drop of the receiver's bitrate "
+                        "in percent in the comparison.")
+    ap.add_argument("--max-loss-increase", action="store",
+                    dest="max_loss_increase", type=float, default=1,
+                    help="specify the allowed increase of the loss "
+                        "in percent points in the comparison.")
+    ap.add_argument("--alpha", action="store", dest="alpha",
+                    type=float, default=0.05,
+                    help="specify the significance level in the comparison. "
+                        "a cell with too few runs to reach it, e.g. "
+                        "less than 4 runs on each side at 0.05, "
+                        "is gated only by the thresholds.")
     ap.add_argument("--save-graph", "-S",
                     action="store_true", dest="save_graph",
                     help="specify to save the graph. "
                         "can be used with the --save-dir option.")
     ap.add_argument("--no-show-graph", action="store_false", dest="show_graph",
                     help="specify not to show the graph.")
+    ap.add_argument("--render-cache-size", action="store",
+                    dest="render_cache_size", type=int, default=256,
+                    help="specify the number of the graphs kept in "
+                        "the render cache, which is used with --save-graph "
+                        "and --no-show-graph.  0 disables the cache.")
+    ap.add_argument("--timing", action="store_true", dest="timing",
+                    help="specify to show the time taken by each phase.")
+    ap.add_argument("--timing-json", action="store", dest="timing_json_file",
+                    help="specify a file to save the time taken "
+                        "by each phase in JSON.")
+    ap.add_argument("--cprofile", action="store", dest="cprofile_file",
+                    help="specify a file to save the cProfile stats "
+                        "of the whole run.  it can be read by pstats.")
     ap.add_argument("--verbose", action="store_true", dest="verbose",
                     help="enable verbose mode.")
     ap.add_argument("--debug", action="store_true", dest="debug",
                     help="enable debug mode.")
-    opt = ap.parse_args()
-    # make directory if needed.
-    if opt.result_dir is not None and not os.path.exists(opt.result_dir):
-        os.mkdir(opt.result_dir)
+    return ap
+
+def set_opt(opt):
+    """
+    set the attributes derived from the arguments.
+    """
+    if opt.make_timeline_graph:
+        opt.with_burst = True
+    opt.render_key = None
+    opt.do_compare = (opt.baseline_dir is not None or
+                      opt.baseline_since is not None or
+                      opt.baseline_until is not None)
     # set br_list and psize_list
     opt.br_list = get_test_list(opt.br_list_str,
                                 br_profile["100m"] if opt.br_profile is None else
                                 br_profile[opt.br_profile])
     opt.psize_list = get_test_list(opt.psize_list_str,
         "16,32,64,128,256,512,768,1024,1280,1448")
-    if not (opt.make_br_graph or opt.make_pps_graph or opt.make_tx_graph):
+    return opt
+
+def get_measure_time(opt):
+    """
+    return the estimated time to measure all the cells in seconds.
+    """
+    t = opt.measure_time * len(opt.br_list) * len(opt.psize_list)
+    if opt.with_ping:
+        t += opt.ping_idle_time * len(opt.br_list) * len(opt.psize_list)
+    return t
+
+def run(opt):
+    if not (opt.make_br_graph or opt.make_pps_graph or opt.make_tx_graph or
+            opt.make_timeline_graph or opt.do_compare or opt.do_pps_search):
         print("bitrate:",
             ",".join([str(n) for n in opt.br_list]))
         print("payload size:",
             ",".join([str(n) for n in opt.psize_list]))
-        t = opt.measure_time * len(opt.br_list) * len(opt.psize_list)
-        print(f"measure time: {t} seconds")
+        print(f"measure time: {get_measure_time(opt)} seconds")
     # do measure
     if opt.do_test:
         measure(opt)
+    if opt.do_pps_search:
+        search_pps(opt)
     # make a graph.
-    if opt.make_br_graph or opt.make_pps_graph or opt.make_tx_graph:
+    if (opt.make_br_graph or opt.make_pps_graph or opt.make_tx_graph or
+            opt.make_timeline_graph or opt.do_compare):
         if opt.br_list_str is None and opt.br_profile is None:
             opt.br_list = "*"
         if opt.psize_list_str is None:
@@ -542,11 +1334,35 @@ def main():
         print("bitrate:", ",".join([str(n) for n in opt.br_list]))
         print("payload size:", ",".join([str(n) for n in opt.psize_list]))
         if opt.make_br_graph:
-            make_br_graph(opt)
+            make_graph(opt, make_br_graph, "br", "br")
         if opt.make_pps_graph:
-            make_pps_graph(opt)
+            make_graph(opt, make_pps_graph, "pps", "pps")
         if opt.make_tx_graph:
-            make_tx_graph(opt)
+            make_graph(opt, make_tx_graph, "tx", "br")
+        if opt.make_timeline_graph:
+            make_graph(opt, make_timeline_graph, "timeline", "timeline")
+        if opt.do_compare and compare(opt):
+            exit(1)
+
+def main():
+    opt = set_opt(get_arg_parser().parse_args())
+    # make directory if needed.
+    if opt.result_dir is not None and not os.path.exists(opt.result_dir):
+        os.mkdir(opt.result_dir)
+    if opt.cprofile_file:
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        run(opt)
+    finally:
+        if opt.cprofile_file:
+            prof.disable()
+            prof.dump_stats(opt.cprofile_file)
+            print(f"saved to {opt.cprofile_file}")
+        if opt.timing:
+            timing.print_summary()
+        if opt.timing_json_file:
+            timing.save_json(opt.timing_json_file)
 
 if __name__ == "__main__" :
     main()
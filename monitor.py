@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+import os
+import time
+import threading
+from collections import deque
+from statistics import mean
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from argparse import ArgumentParser
+from argparse import ArgumentDefaultsHelpFormatter
+import shlex
+from iperf_util import get_arg_parser, set_opt, measure
+from read_logfile import read_logfile
+
+"""
+monitor the link continuously with the short and low rate probes.
+
+a probe is a single cell of iperf_util.  the result of the probe is
+compared with the rolling baseline, i.e. the mean of the last probes.
+the deviated probes are not taken into the baseline, but after
+--rebaseline consecutive ones, the baseline is replaced by them so that
+a lasting change becomes the new baseline.
+when the probe deviates from the baseline, the sweep specified by
+--sweep-args is run to take the details.
+the latest result is exposed in the OpenMetrics text format into the
+file and/or at the HTTP endpoint.
+"""
+
+metric_list = [
+    # name, type, help
+    ("iperf_up", "gauge", "1 if the last probe succeeded."),
+    ("iperf_receiver_bps", "gauge", "the receiver's bitrate of the last probe."),
+    ("iperf_receiver_pps", "gauge", "the receiver's packets per second of the last probe."),
+    ("iperf_lost_percent", "gauge", "the loss rate of the last probe."),
+    ("iperf_jitter_ms", "gauge", "the jitter of the last probe."),
+    ("iperf_probe_deviated", "gauge", "1 if the last probe deviated from the baseline."),
+    ("iperf_probe_timestamp_seconds", "gauge", "the time of the last probe."),
+    ("iperf_probes", "counter", "the number of the probes."),
+    ("iperf_sweeps", "counter", "the number of the sweeps escalated."),
+    ]
+
+def make_metrics(server_name, values):
+    """
+    return the metrics in the OpenMetrics text format.
+    """
+    lines = []
+    for name, mtype, mhelp in metric_list:
+        if name not in values:
+            continue
+        lines.append(f"# TYPE {name} {mtype}")
+        lines.append(f"# HELP {name} {mhelp}")
+        sample = f"{name}_total" if mtype == "counter" else name
+        lines.append(f'{sample}{{server="{server_name}"}} {values[name]}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+def write_textfile(file_name, text):
+    """
+    write the metrics atomically so that the reader never sees a partial one.
+    """
+    with open(f"{file_name}.tmp", "w") as fd:
+        fd.write(text)
+    os.replace(f"{file_name}.tmp", file_name)
+
+def start_http_server(port, get_text):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = get_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type",
+                             "application/openmetrics-text; "
+                             "version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, format, *args):
+            pass
+    httpd = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+def is_deviated(opt, probe, baseline):
+    """
+    return True if the probe deviates from the mean of the baseline.
+    the baseline needs at least --min-baseline probes.
+    """
+    if len(baseline) < opt.min_baseline:
+        return False
+    bps = mean([n["bps"] for n in baseline])
+    lost = mean([n["lost_percent"] for n in baseline])
+    jitter = mean([n["jitter_ms"] for n in baseline])
+    if bps > 0 and (bps - probe["bps"]) / bps * 100 > opt.max_bps_drop:
+        return True
+    if probe["lost_percent"] - lost > opt.max_loss_increase:
+        return True
+    if jitter > 0 and probe["jitter_ms"] > jitter * opt.max_jitter_ratio:
+        return True
+    return False
+
+def make_iperf_opt(opt, args):
+    args = [opt.server_name] + args
+    if opt.result_dir:
+        args += ["--save-dir", opt.result_dir]
+    if opt.port is not None:
+        args += ["--port", str(opt.port)]
+    return set_opt(get_arg_parser().parse_args(args))
+
+def run_probe(probe_opt):
+    """
+    return the receiver's result of the probe, or None if it failed.
+    """
+    files = []
+    try:
+        measure(probe_opt, progress=files.append)
+    except SystemExit:
+        # iperf() exits when iperf3 fails.
+        return None
+    try:
+        d = read_logfile(files[-1])
+    except ValueError as e:
+        # e.g. the output truncated.
+        print(e)
+        return None
+    d["receiver"]["pps"] = d["receiver"]["bps"]/8/d["sender"]["payload_size"]
+    return d["receiver"]
+
+def main():
+    ap = ArgumentParser(
+            description="monitor the link with iperf_util continuously.",
+            formatter_class=ArgumentDefaultsHelpFormatter)
+    ap.add_argument("server_name", help="server name")
+    ap.add_argument("--port", action="store", dest="port", type=int,
+                    help="specify the port number of the server.")
+    ap.add_argument("--interval", action="store", dest="interval",
+                    type=float, default=300,
+                    help="specify the interval of the probes in seconds.")
+    ap.add_argument("--probe-brate", action="store", dest="probe_br",
+                    default="1m",
+                    help="specify the bitrate of the probe.")
+    ap.add_argument("--probe-psize", action="store", dest="probe_psize",
+                    default="1448",
+                    help="specify the payload size of the probe.")
+    ap.add_argument("--probe-time", action="store", dest="probe_time",
+                    type=int, default=3,
+                    help="specify a time to measure the probe.")
+    ap.add_argument("--baseline-size", action="store", dest="baseline_size",
+                    type=int, default=12,
+                    help="specify the number of the probes for the baseline.")
+    ap.add_argument("--min-baseline", action="store", dest="min_baseline",
+                    type=int, default=3,
+                    help="specify the number of the probes needed "
+                        "before the deviation is checked.")
+    ap.add_argument("--rebaseline", action="store", dest="rebaseline",
+                    type=int, default=3,
+                    help="specify the number of the consecutive deviated "
+                        "probes to replace the baseline with.")
+    ap.add_argument("--max-bps-drop", action="store", dest="max_bps_drop",
+                    type=float, default=20,
+                    help="specify the allowed drop of the receiver's bitrate "
+                        "from the baseline in percent.")
+    ap.add_argument("--max-loss-increase", action="store",
+                    dest="max_loss_increase", type=float, default=1,
+                    help="specify the allowed increase of the loss "
+                        "from the baseline in percent points.")
+    ap.add_argument("--max-jitter-ratio", action="store",
+                    dest="max_jitter_ratio", type=float, default=3,
+                    help="specify the allowed ratio of the jitter "
+                        "to the baseline.")
+    ap.add_argument("--sweep-args", action="store", dest="sweep_args",
+                    default="--profile 10m --psize 1448",
+                    help="specify the options of iperf_util.py "
+                        "for the sweep run when the probe deviates.")
+    ap.add_argument("--sweep-holdoff", action="store", dest="sweep_holdoff",
+                    type=float, default=3600,
+                    help="specify the minimum interval of the sweeps "
+                        "in seconds.")
+    ap.add_argument("--save-dir", action="store", dest="result_dir",
+                    help="specify the directory to save the result files.")
+    ap.add_argument("--textfile", action="store", dest="textfile",
+                    help="specify the file to write the metrics into.")
+    ap.add_argument("--listen", action="store", dest="listen_port",
+                    type=int,
+                    help="specify the port to expose the metrics "
+                        "at /metrics.")
+    opt = ap.parse_args()
+    if opt.result_dir is not None and not os.path.exists(opt.result_dir):
+        os.mkdir(opt.result_dir)
+    probe_opt = make_iperf_opt(opt, [
+            "--brate", opt.probe_br,
+            "--psize", opt.probe_psize,
+            "--measure-time", str(opt.probe_time)])
+    sweep_opt = make_iperf_opt(opt, shlex.split(opt.sweep_args))
+    values = {"iperf_probes": 0, "iperf_sweeps": 0}
+    text = make_metrics(opt.server_name, values)
+    if opt.listen_port:
+        start_http_server(opt.listen_port, lambda: text)
+    baseline = deque(maxlen=opt.baseline_size)
+    deviated_probes = []
+    last_sweep = 0
+    while True:
+        t0 = time.time()
+        probe = run_probe(probe_opt)
+        values["iperf_probes"] += 1
+        values["iperf_probe_timestamp_seconds"] = round(t0, 3)
+        if probe is None:
+            values["iperf_up"] = 0
+            values["iperf_probe_deviated"] = 0
+        else:
+            deviated = is_deviated(opt, probe, baseline)
+            values.update({
+                    "iperf_up": 1,
+                    "iperf_receiver_bps": probe["bps"],
+                    "iperf_receiver_pps": round(probe["pps"], 3),
+                    "iperf_lost_percent": probe["lost_percent"],
+                    "iperf_jitter_ms": probe["jitter_ms"],
+                    "iperf_probe_deviated": 1 if deviated else 0,
+                    })
+            if not deviated:
+                # the deviated probe is not taken into the baseline.
+                baseline.append(probe)
+                deviated_probes = []
+            else:
+                deviated_probes.append(probe)
+                if len(deviated_probes) >= opt.rebaseline:
+                    print("deviated consecutively, replace the baseline.")
+                    baseline.clear()
+                    baseline.extend(deviated_probes)
+                    deviated_probes = []
+        text = make_metrics(opt.server_name, values)
+        if opt.textfile:
+            write_textfile(opt.textfile, text)
+        if (values.get("iperf_probe_deviated") and
+                time.time() - last_sweep > opt.sweep_holdoff):
+            print("deviated from the baseline, start the sweep.")
+            last_sweep = time.time()
+            values["iperf_sweeps"] += 1
+            try:
+                measure(sweep_opt)
+            except SystemExit:
+                print("ERROR: the sweep failed.")
+            text = make_metrics(opt.server_name, values)
+            if opt.textfile:
+                write_textfile(opt.textfile, text)
+        time.sleep(max(0, opt.interval - (time.time() - t0)))
+
+if __name__ == "__main__" :
+    main()
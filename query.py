@@ -0,0 +1,55 @@
+import os
+from utils import get_ts_range
+from read_logfile import parse_file_name
+
+"""
+the query of the result files.
+
+the directory is scanned only once, and each file name is parsed into
+an entry like below.  the conditions are applied to the entries in memory.
+    {"name": "iperf-host-sr-br-1000000-ps-1448-20210723193700150587.txt",
+     "server": "host", "dir": "sr", "br": 1000000, "psize": 1448,
+     "ts": "20210723193700150587", "ext": "txt",
+     "path": "sample/iperf-host-sr-br-1000000-ps-1448-20210723193700150587.txt"}
+"""
+
+def scan_dir(result_dir):
+    """
+    return the list of the entries of the result files in the directory.
+    """
+    result = []
+    with os.scandir(result_dir or ".") as it:
+        for de in it:
+            if not de.name.startswith("iperf-"):
+                continue
+            if (entry := parse_file_name(de.name)) is None:
+                continue
+            entry["path"] = os.path.join(result_dir, de.name) if result_dir else de.name
+            result.append(entry)
+    return result
+
+def filter_entries(entries, server=None, direction=None, br_list=None,
+                   psize_list=None, since=None, until=None, ext=None):
+    """
+    return the entries matched with the conditions.
+    a condition of None or "*" matches any.
+    """
+    ts_from, ts_to = get_ts_range(since, until)
+    br_set = None if br_list in [None, "*"] else set(br_list)
+    psize_set = None if psize_list in [None, "*"] else set(psize_list)
+    result = []
+    for entry in entries:
+        if server is not None and entry["server"] != server:
+            continue
+        if direction is not None and entry["dir"] != direction:
+            continue
+        if br_set is not None and entry["br"] not in br_set:
+            continue
+        if psize_set is not None and entry["psize"] not in psize_set:
+            continue
+        if ext is not None and entry["ext"] != ext:
+            continue
+        if not (ts_from <= entry["ts"] <= ts_to):
+            continue
+        result.append(entry)
+    return result
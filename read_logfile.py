@@ -1,10 +1,17 @@
 import re
+import os
+import json
 from utils import convert_xnum
 
 """
 file name:
     e.g. iperf-host-sr-bw-940m-ps-512-20220803082844970472.txt
 """
+re_file_name = re.compile(
+        "^iperf-(?P<server>.+)-(?P<dir>[a-z]{2})-"
+        "br-(?P<br>[^-]+)-"
+        "ps-(?P<psize>[^-]+)-"
+        "(?P<ts>\d+)\.(?P<ext>txt|ping)$")
 re_cmdline = re.compile(
         "% iperf3 -u "
         "-c (?P<host>[^\s]+) "
@@ -13,9 +20,11 @@ re_cmdline = re.compile(
         "-b (?P<bw>\d+)(?P<bw_unit>(|[MKGmkg])) "
         "-l (?P<psize>\d+)"
         ".*")
-re_begin = re.compile("^\[\s*ID]\s*Interval\s+.*Lost/Total Datagrams")
+re_begin = re.compile("^\[\s*ID](\[Role\])?\s*Interval\s+.*Lost/Total Datagrams")
+# the role tag, e.g. [TX-C], exists in the --bidir mode.
+# the sum of the streams, i.e. [SUM], exists with -P more than 1.
 re_result = re.compile(
-        "^\[\s*\d+\]\s*"
+        "^\[\s*(?P<stream>\d+|SUM)\](\[(?P<tag>[TR]X-[CS])\])?\s*"
         "(?P<start>[\d\.]+)-(?P<end>[\d\.]+)\s+sec\s+"
         "(?P<transfer>[\d\.]+)\s+(?P<transfer_unit>(|[MKG]))Bytes\s+"
         "(?P<bitrate>[\d\.]+)\s+(?P<bitrate_unit>(|[MKG]))bits/sec\s+"
@@ -32,6 +41,23 @@ re_tcp_line = re.compile(
         "(?P<transfer>[\d\.]+)\s+(?P<transfer_unit>(|[MKG]))Bytes\s+"
         "(?P<bitrate>[\d\.]+)\s+(?P<bitrate_unit>(|[MKG]))bits/sec\s+"
         )
+# the interval line of UDP.
+# the sender side shows the number of the datagrams sent.
+# [  7]   0.00-1.00   sec   123 KBytes  1.01 Mbits/sec  87
+# the receiver side shows the jitter and the loss.
+# [  5]   0.00-1.00   sec   118 KBytes   969 Kbits/sec  0.264 ms  0/84 (0%)
+# the sum of the streams exists with -P more than 1.
+# [SUM]   0.00-1.00   sec   236 KBytes  1.94 Mbits/sec  0.264 ms  0/168 (0%)
+re_udp_line = re.compile(
+        "^\[\s*(?P<stream>\d+|SUM)\](\[(?P<tag>[TR]X-[CS])\])?\s*"
+        "(?P<start>[\d\.]+)-(?P<end>[\d\.]+)\s+sec\s+"
+        "(?P<transfer>[\d\.]+)\s+(?P<transfer_unit>(|[MKG]))Bytes\s+"
+        "(?P<bitrate>[\d\.]+)\s+(?P<bitrate_unit>(|[MKG]))bits/sec\s+"
+        "((?P<datagrams>\d+)|"
+        "(?P<jitter>[\d\.]+)\s+ms\s+"
+        "(?P<lost>\d+)/(?P<total>\d+)\s+"
+        "\((?P<loss_rate>.+)%\))"
+        "\s*$")
 # assuming the span of each test is 1 sencond.
 # 64 bytes from 1.1.1.1: icmp_seq=109 ttl=63 time=2.196 ms
 re_ping_line = re.compile(
@@ -42,11 +68,32 @@ re_ping_line = re.compile(
         "time=(?P<rtt>[\d\.]+) ms"
         )
 
+def parse_file_name(file_name):
+    """
+    return the attributes of the result file taken from the file name,
+    or None if the name is not of a result file.
+    the directory part of the file_name is ignored.
+    """
+    if (r := re_file_name.match(os.path.basename(file_name))) is None:
+        return None
+    return {
+            "name": os.path.basename(file_name),
+            "server": r.group("server"),
+            "dir": r.group("dir"),
+            "br": convert_xnum(r.group("br")),
+            "psize": convert_xnum(r.group("psize")),
+            "ts": r.group("ts"),
+            "ext": r.group("ext"),
+            }
+
 # parsing the iperf_util output.
 def parse_log(lines, file_name="..."):
     line_no = 0
     for i,line in enumerate(lines):
-        if (r := re_begin.match(line)) is not None:
+        # the header of the intervals is same to the one of the summary
+        # when the client is the receiver, i.e. with -R.
+        if (re_begin.match(line) is not None and i+1 < len(lines) and
+                re_result.match(lines[i+1]) is not None):
             line_no = i
             break
     else:
@@ -58,44 +105,72 @@ def parse_log(lines, file_name="..."):
         target_bw = convert_xnum(f'{r.group("bw")}{r.group("bw_unit")}')
     else:
         raise ValueError(f"invalid cmdline, {file_name}")
-    if (r := re_result.match(lines[line_no+1])) is not None:
-        if r.group("role") != "sender":
-            raise ValueError(f'invalid role {r.group("role")}, {file_name}')
-        result["sender"] = {
-                "start": float(r.group("start")),
-                "end": float(r.group("end")),
-                "bytes_sent": convert_xnum(
-                        f'{r.group("transfer")}{r.group("transfer_unit")}'),
-                "bps": convert_xnum(
-                        f'{r.group("bitrate")}{r.group("bitrate_unit")}'),
-                "jitter_ms": float(r.group("jitter")),
-                "lost": int(r.group("lost")),
-                "packets_sent": int(r.group("total")),
-                "lost_percent": float(r.group("loss_rate")),
-                "payload_size": psize,
-                "target_bw": target_bw,
-                }
-    else:
-        raise ValueError(f"invalid structure, {file_name}")
-    if (r := re_result.match(lines[line_no+2])) is not None:
-        if r.group("role") != "receiver":
-            raise ValueError(f'invalid role {r.group("role")}, {file_name}')
-        result["receiver"] = {
-                "start": float(r.group("start")),
-                "end": float(r.group("end")),
-                "bytes_received": convert_xnum(
-                        f'{r.group("transfer")}{r.group("transfer_unit")}'),
-                "bps": convert_xnum(
-                        f'{r.group("bitrate")}{r.group("bitrate_unit")}'),
-                "jitter_ms": float(r.group("jitter")),
-                "lost": int(r.group("lost")),
-                "packets_received": int(r.group("total")),
-                "lost_percent": float(r.group("loss_rate")),
-                }
+    # the summary lines are grouped by the role tag.
+    # in the --bidir mode, TX-C is of the client to the server,
+    # and RX-C is of the server to the client.
+    blocks = {}
+    for line in lines[line_no+1:]:
+        if (r := re_result.match(line)) is None:
+            break
+        blocks.setdefault(r.group("tag"), []).append(r)
+    # with the parallel streams, the sum of them is taken.
+    for tag, block in blocks.items():
+        if any([r.group("stream") == "SUM" for r in block]):
+            blocks[tag] = [r for r in block if r.group("stream") == "SUM"]
+    if None in blocks:
+        result["sender"], result["receiver"] = parse_summary(
+                blocks[None], psize, target_bw, file_name)
+    elif "TX-C" in blocks and "RX-C" in blocks:
+        result["sender"], result["receiver"] = parse_summary(
+                blocks["TX-C"], psize, target_bw, file_name)
+        result["reverse"] = {}
+        result["reverse"]["sender"], result["reverse"]["receiver"] = parse_summary(
+                blocks["RX-C"], psize, target_bw, file_name)
     else:
         raise ValueError(f"invalid structure, {file_name}")
     return result
 
+def parse_summary(block, psize, target_bw, file_name="..."):
+    """
+    return the results of the sender and the receiver
+    in the lines of the summary.
+    """
+    if len(block) < 2:
+        raise ValueError(f"invalid structure, {file_name}")
+    r = block[0]
+    if r.group("role") != "sender":
+        raise ValueError(f'invalid role {r.group("role")}, {file_name}')
+    sender = {
+            "start": float(r.group("start")),
+            "end": float(r.group("end")),
+            "bytes_sent": convert_xnum(
+                    f'{r.group("transfer")}{r.group("transfer_unit")}'),
+            "bps": convert_xnum(
+                    f'{r.group("bitrate")}{r.group("bitrate_unit")}'),
+            "jitter_ms": float(r.group("jitter")),
+            "lost": int(r.group("lost")),
+            "packets_sent": int(r.group("total")),
+            "lost_percent": float(r.group("loss_rate")),
+            "payload_size": psize,
+            "target_bw": target_bw,
+            }
+    r = block[1]
+    if r.group("role") != "receiver":
+        raise ValueError(f'invalid role {r.group("role")}, {file_name}')
+    receiver = {
+            "start": float(r.group("start")),
+            "end": float(r.group("end")),
+            "bytes_received": convert_xnum(
+                    f'{r.group("transfer")}{r.group("transfer_unit")}'),
+            "bps": convert_xnum(
+                    f'{r.group("bitrate")}{r.group("bitrate_unit")}'),
+            "jitter_ms": float(r.group("jitter")),
+            "lost": int(r.group("lost")),
+            "packets_received": int(r.group("total")),
+            "lost_percent": float(r.group("loss_rate")),
+            }
+    return sender, receiver
+
 def read_logfile(file_name):
     return parse_log(open(file_name).read().splitlines(), file_name)
 
@@ -117,6 +192,89 @@ def parse_tcp_log(lines, file_name="..."):
 def read_tcp_logfile(file_name):
     return parse_tcp_log(open(file_name).read().splitlines(), file_name)
 
+def parse_udp_log(lines, file_name="..."):
+    """
+    return the list of the intervals of UDP.
+    the summary lines are not included.
+    "side" is "server" if the line is in the server's output taken by
+    --get-server-output, otherwise "client".
+    "stream" is the ID of the stream, or "SUM" for the sum of the streams,
+    which exists with -P more than 1.
+    "jitter_ms", "lost" and "lost_percent" are None at the sender side.
+    """
+    result = []
+    side = "client"
+    for line in lines:
+        if line.startswith("Server output:"):
+            side = "server"
+            continue
+        if (r := re_udp_line.match(line)) is None:
+            continue
+        n = {
+                "side": side,
+                "stream": r.group("stream"),
+                "tag": r.group("tag"),
+                "start": float(r.group("start")),
+                "end": float(r.group("end")),
+                "bytes": convert_xnum(
+                        f'{r.group("transfer")}{r.group("transfer_unit")}'),
+                "bps": convert_xnum(
+                        f'{r.group("bitrate")}{r.group("bitrate_unit")}'),
+                "jitter_ms": None,
+                "lost": None,
+                "lost_percent": None,
+                }
+        if r.group("datagrams") is not None:
+            n["packets"] = int(r.group("datagrams"))
+        else:
+            n["packets"] = int(r.group("total"))
+            n["jitter_ms"] = float(r.group("jitter"))
+            n["lost"] = int(r.group("lost"))
+            n["lost_percent"] = (100 * n["lost"] / n["packets"]
+                                 if n["packets"] > 0 else 0)
+        result.append(n)
+    return result
+
+def read_udp_logfile(file_name):
+    return parse_udp_log(open(file_name).read().splitlines(), file_name)
+
+def parse_server_json(text, file_name="..."):
+    """
+    return the port, the start time and the intervals of the receiver side
+    in the JSON output of the iperf3 server, taken by --json --logfile.
+    the intervals are in the same form as parse_udp_log().
+    return None if the output doesn't have any test.
+    """
+    try:
+        d = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if "error" in d or len(d.get("start", {}).get("connected", [])) == 0:
+        return None
+    result = {
+            "port": d["start"]["connected"][0]["local_port"],
+            "ts": d["start"]["timestamp"]["timesecs"],
+            "intervals": [],
+            }
+    for n in d.get("intervals", []):
+        n = n["sum"]
+        if n.get("sender", False) or "jitter_ms" not in n:
+            continue
+        result["intervals"].append({
+                "side": "server",
+                "stream": "SUM",
+                "tag": None,
+                "start": n["start"],
+                "end": n["end"],
+                "bytes": n["bytes"],
+                "bps": n["bits_per_second"],
+                "packets": n["packets"],
+                "jitter_ms": n["jitter_ms"],
+                "lost": n["lost_packets"],
+                "lost_percent": n["lost_percent"],
+                })
+    return result
+
 def parse_ping_log(lines, file_name="..."):
     result = []
     line_no = 0
@@ -141,6 +299,31 @@ def parse_ping_log(lines, file_name="..."):
 def read_ping_logfile(file_name):
     return parse_ping_log(open(file_name).read().splitlines(), file_name)
 
+# parsing the ping output taken during the iperf run.
+def parse_ping_window(lines, file_name="..."):
+    """
+    split the RTT samples into the ones taken before iperf started (idle),
+    and the ones taken while iperf was running (loaded).
+    the window of the iperf run is recorded in the line like below.
+        % window 1627036620.150587 1627036630.268340
+    """
+    window = None
+    for line in lines:
+        if line.startswith("% window "):
+            window = [float(n) for n in line.split()[2:4]]
+    if window is None:
+        raise ValueError(f"window not found, {file_name}")
+    result = {"window": window, "idle": [], "loaded": []}
+    for n in parse_ping_log(lines, file_name):
+        if n["ts"] < window[0]:
+            result["idle"].append(n["rtt"])
+        elif n["ts"] <= window[1]:
+            result["loaded"].append(n["rtt"])
+    return result
+
+def read_ping_window(file_name):
+    return parse_ping_window(open(file_name).read().splitlines(), file_name)
+
 if __name__ == "__main__":
     # test
     import sys
@@ -238,6 +421,278 @@ iperf Done.
         "packets_received": 78120,
         "lost_percent": 0.0
     }
+}
+    """ ],
+            [ """
+% iperf3 -u -c 192.168.0.102 -P 1 -t 10 -b 1000000 -l 1448 --bidir
+[  5][TX-C] local 192.168.0.103 port 62049 connected to 192.168.0.102 port 5201
+[  7][RX-C] local 192.168.0.103 port 62050 connected to 192.168.0.102 port 5201
+[ ID][Role] Interval           Transfer     Bitrate         Total Datagrams
+[  5][TX-C]   0.00-1.00   sec   123 KBytes  1.01 Mbits/sec  87  
+[  7][RX-C]   0.00-1.00   sec   122 KBytes   996 Kbits/sec  0.052 ms  0/86 (0%)  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[ ID][Role] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5][TX-C]   0.00-10.00  sec  1.19 MBytes  1.00 Mbits/sec  0.000 ms  0/864 (0%)  sender
+[  5][TX-C]   0.00-10.00  sec  1.19 MBytes  1.00 Mbits/sec  0.289 ms  0/864 (0%)  receiver
+[  7][RX-C]   0.00-10.00  sec  1.19 MBytes  1.00 Mbits/sec  0.000 ms  0/864 (0%)  sender
+[  7][RX-C]   0.00-10.00  sec  1.10 MBytes   920 Kbits/sec  0.312 ms  69/864 (8%)  receiver
+
+iperf Done.
+    """,
+    """
+{
+    "sender": {
+        "start": 0.0,
+        "end": 10.0,
+        "bytes_sent": 1190000.0,
+        "bps": 1000000.0,
+        "jitter_ms": 0.0,
+        "lost": 0,
+        "packets_sent": 864,
+        "lost_percent": 0.0,
+        "payload_size": 1448,
+        "target_bw": 1000000
+    },
+    "receiver": {
+        "start": 0.0,
+        "end": 10.0,
+        "bytes_received": 1190000.0,
+        "bps": 1000000.0,
+        "jitter_ms": 0.289,
+        "lost": 0,
+        "packets_received": 864,
+        "lost_percent": 0.0
+    },
+    "reverse": {
+        "sender": {
+            "start": 0.0,
+            "end": 10.0,
+            "bytes_sent": 1190000.0,
+            "bps": 1000000.0,
+            "jitter_ms": 0.0,
+            "lost": 0,
+            "packets_sent": 864,
+            "lost_percent": 0.0,
+            "payload_size": 1448,
+            "target_bw": 1000000
+        },
+        "receiver": {
+            "start": 0.0,
+            "end": 10.0,
+            "bytes_received": 1100000.0,
+            "bps": 920000,
+            "jitter_ms": 0.312,
+            "lost": 69,
+            "packets_received": 864,
+            "lost_percent": 8.0
+        }
+    }
+}
+    """ ],
+            [ """
+% iperf3 -u -c 192.168.0.102 -P 2 -t 2 -b 1000000 -l 1448 -R
+[  5] local 192.168.0.103 port 62049 connected to 192.168.0.102 port 5201
+[  7] local 192.168.0.103 port 62050 connected to 192.168.0.102 port 5201
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-1.00   sec  66.4 KBytes   544 Kbits/sec  0.050 ms  40/87 (46%)  
+[  7]   0.00-1.00   sec   123 KBytes  1.01 Mbits/sec  0.040 ms  0/87 (0%)  
+[SUM]   0.00-1.00   sec   189 KBytes  1.55 Mbits/sec  0.045 ms  40/174 (23%)  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.000 ms  0/174 (0%)  sender
+[  5]   0.00-2.00   sec   133 KBytes   544 Kbits/sec  0.052 ms  80/174 (46%)  receiver
+[  7]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.000 ms  0/174 (0%)  sender
+[  7]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.041 ms  0/174 (0%)  receiver
+[SUM]   0.00-2.00   sec   492 KBytes  2.02 Mbits/sec  0.000 ms  0/348 (0%)  sender
+[SUM]   0.00-2.00   sec   379 KBytes  1.55 Mbits/sec  0.046 ms  80/348 (23%)  receiver
+
+iperf Done.
+    """,
+    """
+{
+    "sender": {
+        "start": 0.0,
+        "end": 2.0,
+        "bytes_sent": 492000,
+        "bps": 2020000.0,
+        "jitter_ms": 0.0,
+        "lost": 0,
+        "packets_sent": 348,
+        "lost_percent": 0.0,
+        "payload_size": 1448,
+        "target_bw": 1000000
+    },
+    "receiver": {
+        "start": 0.0,
+        "end": 2.0,
+        "bytes_received": 379000,
+        "bps": 1550000.0,
+        "jitter_ms": 0.046,
+        "lost": 80,
+        "packets_received": 348,
+        "lost_percent": 23.0
+    }
+}
+    """ ],
+    ]
+    # parse_udp_log() with --get-server-output
+    testv_udp = [
+            [ """
+% iperf3 -u -c 192.168.0.102 -P 1 -t 2 -b 1000000 -l 1448 --get-server-output
+[  5] local 192.168.0.103 port 62049 connected to 192.168.0.102 port 5201
+[ ID] Interval           Transfer     Bitrate         Total Datagrams
+[  5]   0.00-1.00   sec   123 KBytes  1.01 Mbits/sec  87  
+[  5]   1.00-2.00   sec   122 KBytes   999 Kbits/sec  86  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-2.00   sec   245 KBytes  1.00 Mbits/sec  0.000 ms  0/173 (0%)  sender
+[  5]   0.00-2.00   sec   242 KBytes   990 Kbits/sec  0.264 ms  2/173 (1.2%)  receiver
+
+Server output:
+-----------------------------------------------------------
+Accepted connection from 192.168.0.103, port 62048
+[  5] local 192.168.0.102 port 5201 connected to 192.168.0.103 port 62049
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-1.00   sec   122 KBytes   996 Kbits/sec  0.052 ms  0/86 (0%)  
+[  5]   1.00-2.00   sec   120 KBytes   984 Kbits/sec  0.264 ms  2/87 (2.3%)  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-2.00   sec   242 KBytes   990 Kbits/sec  0.264 ms  2/173 (1.2%)  receiver
+
+iperf Done.
+    """,
+    """
+[
+    {"side": "client", "stream": "5", "tag": null, "start": 0.0, "end": 1.0,
+     "bytes": 123000, "bps": 1010000.0, "packets": 87,
+     "jitter_ms": null, "lost": null, "lost_percent": null},
+    {"side": "client", "stream": "5", "tag": null, "start": 1.0, "end": 2.0,
+     "bytes": 122000, "bps": 999000, "packets": 86,
+     "jitter_ms": null, "lost": null, "lost_percent": null},
+    {"side": "server", "stream": "5", "tag": null, "start": 0.0, "end": 1.0,
+     "bytes": 122000, "bps": 996000, "packets": 86,
+     "jitter_ms": 0.052, "lost": 0, "lost_percent": 0.0},
+    {"side": "server", "stream": "5", "tag": null, "start": 1.0, "end": 2.0,
+     "bytes": 120000, "bps": 984000, "packets": 87,
+     "jitter_ms": 0.264, "lost": 2, "lost_percent": 2.2988505747126435}
+]
+    """ ],
+            [ """
+% iperf3 -u -c 192.168.0.102 -P 2 -t 2 -b 1000000 -l 1448 -R
+[  5] local 192.168.0.103 port 62049 connected to 192.168.0.102 port 5201
+[  7] local 192.168.0.103 port 62050 connected to 192.168.0.102 port 5201
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-1.00   sec  66.4 KBytes   544 Kbits/sec  0.050 ms  40/87 (46%)  
+[  7]   0.00-1.00   sec   123 KBytes  1.01 Mbits/sec  0.040 ms  0/87 (0%)  
+[SUM]   0.00-1.00   sec   189 KBytes  1.55 Mbits/sec  0.045 ms  40/174 (23%)  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[  5]   1.00-2.00   sec  66.4 KBytes   544 Kbits/sec  0.052 ms  40/87 (46%)  
+[  7]   1.00-2.00   sec   123 KBytes  1.01 Mbits/sec  0.041 ms  0/87 (0%)  
+[SUM]   1.00-2.00   sec   189 KBytes  1.55 Mbits/sec  0.046 ms  40/174 (23%)  
+- - - - - - - - - - - - - - - - - - - - - - - - -
+[ ID] Interval           Transfer     Bitrate         Jitter    Lost/Total Datagrams
+[  5]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.000 ms  0/174 (0%)  sender
+[  5]   0.00-2.00   sec   133 KBytes   544 Kbits/sec  0.052 ms  80/174 (46%)  receiver
+[  7]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.000 ms  0/174 (0%)  sender
+[  7]   0.00-2.00   sec   246 KBytes  1.01 Mbits/sec  0.041 ms  0/174 (0%)  receiver
+[SUM]   0.00-2.00   sec   492 KBytes  2.02 Mbits/sec  0.000 ms  0/348 (0%)  sender
+[SUM]   0.00-2.00   sec   379 KBytes  1.55 Mbits/sec  0.046 ms  80/348 (23%)  receiver
+
+iperf Done.
+    """,
+    """
+[
+    {"side": "client", "stream": "5", "tag": null, "start": 0.0, "end": 1.0,
+     "bytes": 66400.0, "bps": 544000, "packets": 87,
+     "jitter_ms": 0.05, "lost": 40, "lost_percent": 45.97701149425287},
+    {"side": "client", "stream": "7", "tag": null, "start": 0.0, "end": 1.0,
+     "bytes": 123000, "bps": 1010000.0, "packets": 87,
+     "jitter_ms": 0.04, "lost": 0, "lost_percent": 0.0},
+    {"side": "client", "stream": "SUM", "tag": null, "start": 0.0, "end": 1.0,
+     "bytes": 189000, "bps": 1550000.0, "packets": 174,
+     "jitter_ms": 0.045, "lost": 40, "lost_percent": 22.988505747126435},
+    {"side": "client", "stream": "5", "tag": null, "start": 1.0, "end": 2.0,
+     "bytes": 66400.0, "bps": 544000, "packets": 87,
+     "jitter_ms": 0.052, "lost": 40, "lost_percent": 45.97701149425287},
+    {"side": "client", "stream": "7", "tag": null, "start": 1.0, "end": 2.0,
+     "bytes": 123000, "bps": 1010000.0, "packets": 87,
+     "jitter_ms": 0.041, "lost": 0, "lost_percent": 0.0},
+    {"side": "client", "stream": "SUM", "tag": null, "start": 1.0, "end": 2.0,
+     "bytes": 189000, "bps": 1550000.0, "packets": 174,
+     "jitter_ms": 0.046, "lost": 40, "lost_percent": 22.988505747126435}
+]
+    """ ],
+    ]
+    # parse_server_json() of iperf3 -s --one-off --json
+    testv_server = [
+            [ """
+{
+    "start": {
+        "connected": [{
+            "socket": 5,
+            "local_host": "192.168.0.102",
+            "local_port": 5201,
+            "remote_host": "192.168.0.103",
+            "remote_port": 62049
+        }],
+        "version": "iperf 3.9",
+        "timestamp": {
+            "time": "Fri, 23 Jul 2021 10:37:00 GMT",
+            "timesecs": 1627036620
+        },
+        "test_start": {"protocol": "UDP", "num_streams": 1, "blksize": 1448}
+    },
+    "intervals": [{
+        "streams": [],
+        "sum": {"start": 0, "end": 1.000153, "seconds": 1.000153,
+                "bytes": 124528, "bits_per_second": 996071.6,
+                "jitter_ms": 0.052, "lost_packets": 0, "packets": 86,
+                "lost_percent": 0, "sender": false}
+    }, {
+        "streams": [],
+        "sum": {"start": 1.000153, "end": 2.000212, "seconds": 1.000059,
+                "bytes": 123080, "bits_per_second": 984582.1,
+                "jitter_ms": 0.264, "lost_packets": 2, "packets": 87,
+                "lost_percent": 2.298851, "sender": false}
+    }],
+    "end": {}
+}
+    """,
+    """
+{
+    "port": 5201,
+    "ts": 1627036620,
+    "intervals": [
+        {"side": "server", "stream": "SUM", "tag": null, "start": 0, "end": 1.000153,
+         "bytes": 124528, "bps": 996071.6, "packets": 86,
+         "jitter_ms": 0.052, "lost": 0, "lost_percent": 0},
+        {"side": "server", "stream": "SUM", "tag": null, "start": 1.000153, "end": 2.000212,
+         "bytes": 123080, "bps": 984582.1, "packets": 87,
+         "jitter_ms": 0.264, "lost": 2, "lost_percent": 2.298851}
+    ]
+}
+    """ ],
+    ]
+    # parse_ping_window()
+    testv_ping = [
+            [ """
+% ping -D -n -i 0.2 192.168.0.102
+PING 192.168.0.102 (192.168.0.102): 56 data bytes
+[1627036619.950000] 64 bytes from 192.168.0.102: icmp_seq=0 ttl=64 time=1.201 ms
+[1627036620.150000] 64 bytes from 192.168.0.102: icmp_seq=1 ttl=64 time=1.305 ms
+[1627036620.350000] 64 bytes from 192.168.0.102: icmp_seq=2 ttl=64 time=9.870 ms
+[1627036620.550000] 64 bytes from 192.168.0.102: icmp_seq=3 ttl=64 time=12.442 ms
+[1627036620.750000] 64 bytes from 192.168.0.102: icmp_seq=4 ttl=64 time=1.150 ms
+
+--- 192.168.0.102 ping statistics ---
+5 packets transmitted, 5 packets received, 0.0% packet loss
+% window 1627036620.150587 1627036620.600000
+    """,
+    """
+{
+    "window": [1627036620.150587, 1627036620.6],
+    "idle": [1.201, 1.305],
+    "loaded": [9.87, 12.442]
 }
     """ ],
     ]
@@ -252,3 +707,15 @@ iperf Done.
             r = parse_log(t[0].splitlines()[1:])
             print(json.dumps(r, indent=4))
             print(r == json.loads(t[1]))
+        for t in testv_udp:
+            r = parse_udp_log(t[0].splitlines()[1:])
+            print(json.dumps(r, indent=4))
+            print(r == json.loads(t[1]))
+        for t in testv_server:
+            r = parse_server_json(t[0])
+            print(json.dumps(r, indent=4))
+            print(r == json.loads(t[1]))
+        for t in testv_ping:
+            r = parse_ping_window(t[0].splitlines()[1:])
+            print(json.dumps(r, indent=4))
+            print(r == json.loads(t[1]))
@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import shutil
+
+"""
+the cache of the graphs rendered by iperf_util.
+
+a graph is saved in the cache directory with the hash of its inputs
+as the name, like below.
+    <result_dir>/.render-cache/<sha256>.png
+the inputs are the result files, the kind of the graph and the options.
+a result file is identified by the name, the mtime and the size,
+or by the offset and the length in the archive, which is append-only.
+when a graph with the same inputs is found, it is used instead of
+reading the results and rendering the graph again.
+the graphs are evicted in the LRU order, where the mtime of a graph is
+updated when it is used.
+"""
+
+cache_dir_name = ".render-cache"
+
+def get_cache_dir(result_dir):
+    return os.path.join(result_dir or ".", cache_dir_name)
+
+def get_key(entries, graph_name, options):
+    """
+    return the key of the graph made from the entries of the results,
+    taken by scan_dir() or archive.query(), with the options.
+    """
+    items = []
+    for entry in entries:
+        if "offset" in entry:
+            items.append([entry["name"], entry["offset"], entry["length"]])
+        else:
+            st = os.stat(entry["path"])
+            items.append([entry["name"], st.st_mtime_ns, st.st_size])
+    text = json.dumps({
+            "entries": sorted(items),
+            "graph": graph_name,
+            "options": options,
+            }, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def lookup(cache_dir, key):
+    """
+    return the path of the graph in the cache, or None if not found.
+    """
+    path = os.path.join(cache_dir, f"{key}.png")
+    if not os.path.exists(path):
+        return None
+    # for LRU
+    os.utime(path)
+    return path
+
+def store(cache_dir, key, file_name, max_files):
+    """
+    copy the graph into the cache, and evict the old ones
+    so that the cache has max_files graphs at most.
+    """
+    if not os.path.exists(cache_dir):
+        os.mkdir(cache_dir)
+    path = os.path.join(cache_dir, f"{key}.png")
+    shutil.copyfile(file_name, f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    evict(cache_dir, max_files)
+
+def evict(cache_dir, max_files):
+    with os.scandir(cache_dir) as it:
+        files = sorted([(de.stat().st_mtime, de.path) for de in it
+                        if de.name.endswith(".png")])
+    for _, path in files[:max(0, len(files) - max_files)]:
+        os.remove(path)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+from subprocess import Popen, DEVNULL, TimeoutExpired
+from argparse import ArgumentParser
+from argparse import ArgumentDefaultsHelpFormatter
+from utils import get_ts
+from read_logfile import parse_server_json
+
+"""
+the pool of the iperf3 servers.
+
+an iperf3 server runs with --one-off on each port in the range,
+so that the output of each test is saved into its own file, like below.
+    iperf-srv-5201-20210723193700150587.json
+the server is restarted after each test.
+
+a client leases a free port through the control port.
+the pool sends the port number in a line, and the port is leased
+while the client keeps the connection.  after the client closes it,
+the server is restarted before the port is leased again.
+so, the concurrent clients never hit "the server is busy".
+"""
+
+def lease_port(host, control_port, timeout=None):
+    """
+    return the port number leased, and the socket to be closed
+    after the test.
+    """
+    sock = socket.create_connection((host, control_port), timeout=timeout)
+    line = sock.makefile().readline()
+    if not line:
+        sock.close()
+        raise ValueError(f"no port is leased from {host}:{control_port}")
+    return int(line), sock
+
+def get_port_range(arg):
+    if "-" in arg:
+        p0, p1 = arg.split("-")
+        return list(range(int(p0), int(p1)+1))
+    return [int(n) for n in arg.split(",")]
+
+def supervise(opt, pool, port):
+    """
+    run the iperf3 server on the port, and restart it after each test.
+    each run of the server has its generation so that a release of
+    the lease terminates only the server leased, but not the one
+    restarted already.
+    """
+    p = pool["ports"][port]
+    cv = pool["cv"]
+    while True:
+        logfile = f"{opt.log_dir}/iperf-srv-{port}-{get_ts()}.json"
+        cmd = [opt.iperf3, "-s", "-p", str(port), "--one-off",
+               "--json", "--logfile", logfile]
+        t0 = time.time()
+        proc = Popen(cmd, stdin=DEVNULL, stdout=DEVNULL, stderr=DEVNULL)
+        # wait for the server to listen.
+        time.sleep(0.2)
+        with cv:
+            p["gen"] += 1
+            gen = p["gen"]
+            p["ready"] = proc.poll() is None
+            cv.notify_all()
+        while True:
+            try:
+                proc.wait(timeout=1)
+                break
+            except TimeoutExpired:
+                # the client may not have connected to the server.
+                if (p["released_gen"] == gen and
+                        time.time() - p["released_at"] > opt.grace):
+                    proc.terminate()
+        with cv:
+            p["ready"] = False
+        if os.path.exists(logfile) and os.path.getsize(logfile) == 0:
+            os.remove(logfile)
+        if proc.returncode != 0 and time.time() - t0 < 1:
+            print(f"ERROR: iperf3 on {port} exited with {proc.returncode}")
+            time.sleep(opt.backoff)
+
+def start_control_server(opt, pool):
+    cv = pool["cv"]
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            port = None
+            with cv:
+                deadline = time.time() + opt.lease_timeout
+                while port is None:
+                    for n, p in pool["ports"].items():
+                        if p["ready"] and not p["leased"]:
+                            port = n
+                            break
+                    else:
+                        if time.time() > deadline:
+                            return
+                        cv.wait(timeout=1)
+                pool["ports"][port]["leased"] = True
+                gen = pool["ports"][port]["gen"]
+            print(f"lease {port} to {self.client_address[0]}")
+            try:
+                self.wfile.write(f"{port}\n".encode())
+                # wait until the client closes the connection.
+                while self.rfile.read(1):
+                    pass
+            except OSError:
+                pass
+            finally:
+                with cv:
+                    p = pool["ports"][port]
+                    p["leased"] = False
+                    if p["gen"] == gen:
+                        # the server leased is still running.
+                        p["ready"] = False
+                        p["released_gen"] = gen
+                        p["released_at"] = time.time()
+                print(f"release {port}")
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((opt.bind, opt.control_port),
+                                             Handler)
+    server.daemon_threads = True
+    return server
+
+def scan_server_logs(log_dir):
+    """
+    return the list of the server outputs in the directory.
+    """
+    result = []
+    with os.scandir(log_dir) as it:
+        for de in it:
+            if not (de.name.startswith("iperf-srv-") and
+                    de.name.endswith(".json")):
+                continue
+            d = parse_server_json(open(de.path).read(), de.path)
+            if d is not None:
+                d["name"] = de.path
+                result.append(d)
+    return result
+
+def match_server_log(server_logs, port, ts, tolerance):
+    """
+    return the server output of the test at the port, which started
+    within tolerance seconds after ts, i.e. the timestamp of the client's
+    result file.  timesecs of iperf3 is in seconds, so one second earlier
+    is allowed.  return None if not found.
+    """
+    t0 = datetime.strptime(ts, "%Y%m%d%H%M%S%f").timestamp()
+    candidates = [d for d in server_logs
+                  if d["port"] == port and -1 <= d["ts"] - t0 <= tolerance]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda d: abs(d["ts"] - t0))
+
+def main():
+    ap = ArgumentParser(
+            description="run the pool of the iperf3 servers.",
+            formatter_class=ArgumentDefaultsHelpFormatter)
+    ap.add_argument("--ports", action="store", dest="port_range",
+                    default="5201-5204",
+                    help="specify the ports of the servers, "
+                        "e.g. 5201-5204 or 5201,5203.")
+    ap.add_argument("--control-port", action="store", dest="control_port",
+                    type=int, default=5200,
+                    help="specify the port to lease the ports.")
+    ap.add_argument("--bind", action="store", dest="bind", default="",
+                    help="specify the address to bind the control port.")
+    ap.add_argument("--log-dir", action="store", dest="log_dir",
+                    default="server-log",
+                    help="specify the directory to save the server outputs.")
+    ap.add_argument("--lease-timeout", action="store", dest="lease_timeout",
+                    type=float, default=600,
+                    help="specify the time to wait for a free port.")
+    ap.add_argument("--grace", action="store", dest="grace",
+                    type=float, default=5,
+                    help="specify the time to wait for the server to exit "
+                        "after the release.")
+    ap.add_argument("--backoff", action="store", dest="backoff",
+                    type=float, default=5,
+                    help="specify the time to wait before restarting "
+                        "the server failed.")
+    ap.add_argument("--iperf3", action="store", dest="iperf3",
+                    default="iperf3",
+                    help="specify the iperf3 command.")
+    opt = ap.parse_args()
+    if not os.path.exists(opt.log_dir):
+        os.mkdir(opt.log_dir)
+    pool = {"cv": threading.Condition(), "ports": {}}
+    for port in get_port_range(opt.port_range):
+        pool["ports"][port] = {"ready": False, "leased": False, "gen": 0,
+                               "released_gen": None, "released_at": None}
+        threading.Thread(target=supervise, args=(opt, pool, port),
+                         daemon=True).start()
+    server = start_control_server(opt, pool)
+    print(f"ports: {','.join([str(n) for n in pool['ports']])}, "
+          f"control port: {opt.control_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__" :
+    main()
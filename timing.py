@@ -0,0 +1,46 @@
+import time
+import json
+from contextlib import contextmanager
+
+"""
+the timing of each phase of iperf_util.
+
+the elapsed time is accumulated by the name of the phase, like below.
+    with timing.phase("read_result.parse"):
+        ...
+"""
+
+phase_list = {}
+
+def add(name, elapsed):
+    p = phase_list.setdefault(name, {"count": 0, "total": 0, "max": 0})
+    p["count"] += 1
+    p["total"] += elapsed
+    p["max"] = max(p["max"], elapsed)
+
+@contextmanager
+def phase(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - t0)
+
+def print_summary():
+    column_size = [24,8,10,10,10]
+    fmt = " ".join([f"{{:{n}}}" for n in column_size])
+    print(fmt.format("Phase", "Count", "Total(s)", "Avr.(ms)", "Max(ms)"))
+    print(" ".join(["-"*n for n in column_size]))
+    for name in sorted(phase_list, key=lambda n: -phase_list[n]["total"]):
+        p = phase_list[name]
+        print(fmt.format(
+                name,
+                p["count"],
+                round(p["total"],3),
+                round(p["total"]/p["count"]*1e3,3),
+                round(p["max"]*1e3,3)))
+
+def save_json(file_name):
+    with open(file_name, "w") as fd:
+        fd.write(json.dumps(phase_list, indent=4))
+    print(f"saved to {file_name}")
@@ -7,6 +7,13 @@ def get_ts():
     """
     return datetime.now().strftime("%Y%m%d%H%M%S%f")
 
+def get_ts_range(since, until):
+    """
+    return the range of the timestamp made by get_ts().
+    since and until can be a prefix of the timestamp, e.g. 20210723.
+    """
+    return ((since or "").ljust(20, "0"), (until or "").ljust(20, "9"))
+
 def convert_xnum(n):
     if n.find(".") > 0:
         # float
@@ -42,3 +49,32 @@ def get_test_list(opt_str, default):
                 convert_xnum(delta_bw))]
     else:
         return [convert_xnum(n) for n in opt_str.split(",")]
+
+def get_percentile(values, p):
+    """
+    return the p-th percentile of the values with linear interpolation.
+    return None if the values is empty.
+    """
+    if len(values) == 0:
+        return None
+    v = sorted(values)
+    k = (len(v) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(v) - 1)
+    return v[f] + (v[c] - v[f]) * (k - f)
+
+def parse_cpu_list(s):
+    """
+    return the list of the CPU numbers in the format of cpulist in sysfs,
+    e.g. 0-3,8-11.
+    """
+    result = []
+    for n in s.strip().split(","):
+        if n == "":
+            continue
+        if "-" in n:
+            c0, c1 = n.split("-")
+            result.extend(range(int(c0), int(c1)+1))
+        else:
+            result.append(int(n))
+    return result